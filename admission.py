@@ -0,0 +1,190 @@
+import os
+import time
+import uuid
+import threading
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+from telemetry import get_logger
+
+# Load environment variables
+load_dotenv()
+
+logger = get_logger(__name__)
+
+# Hard bounds on request parameters
+MAX_POP_SIZE = int(os.getenv('MAX_POP_SIZE', 1000))
+MAX_GENERATIONS = int(os.getenv('MAX_GENERATIONS', 5000))
+# Cost = pop_size * generations * n_departments^2 (see estimate_cost)
+MAX_JOB_COST = int(os.getenv('MAX_JOB_COST', 500_000_000))
+HEAVY_JOB_COST = int(os.getenv('HEAVY_JOB_COST', 20_000_000))
+# Per-user limits
+USER_MAX_CONCURRENT = int(os.getenv('USER_MAX_CONCURRENT', 2))
+USER_COMPUTE_QUOTA = int(os.getenv('USER_COMPUTE_QUOTA', 2_000_000_000))
+QUOTA_WINDOW_SECONDS = int(os.getenv('QUOTA_WINDOW_SECONDS', 3600))
+# Background pool for heavy jobs
+BACKGROUND_WORKERS = int(os.getenv('BACKGROUND_WORKERS', 2))
+BACKGROUND_QUEUE_SIZE = int(os.getenv('BACKGROUND_QUEUE_SIZE', 16))
+# Finished background jobs are kept this long for polling
+JOB_TTL_SECONDS = int(os.getenv('JOB_TTL_SECONDS', 3600))
+
+class AdmissionError(Exception):
+    """Raised when a request is rejected; status is the HTTP status to answer with"""
+
+    def __init__(self, message, status=429):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+def estimate_cost(pop_size, generations, n_departments):
+    """Rough compute cost of an optimization run: pop_size * generations * n^2"""
+    return int(pop_size) * int(generations) * int(n_departments) ** 2
+
+class AdmissionController:
+    """
+    Bounds request parameters and enforces per-user concurrency and a
+    rolling-window compute quota (in estimate_cost units).
+    """
+
+    def __init__(self, max_concurrent=USER_MAX_CONCURRENT, quota=USER_COMPUTE_QUOTA,
+                 window_seconds=QUOTA_WINDOW_SECONDS):
+        self.max_concurrent = max_concurrent
+        self.quota = quota
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._running = {}  # user_id -> admitted jobs not yet released
+        self._charges = {}  # user_id -> deque of (timestamp, cost)
+
+    def check_parameters(self, pop_size, generations, n_departments):
+        """Validate parameters and return the job cost; raises AdmissionError(400) if out of range"""
+        try:
+            pop_size, generations = int(pop_size), int(generations)
+        except (TypeError, ValueError):
+            raise AdmissionError('popSize and generations must be integers', 400)
+        if not 2 <= pop_size <= MAX_POP_SIZE:
+            raise AdmissionError(f'popSize must be between 2 and {MAX_POP_SIZE}', 400)
+        if not 1 <= generations <= MAX_GENERATIONS:
+            raise AdmissionError(f'generations must be between 1 and {MAX_GENERATIONS}', 400)
+        # A single department has only one layout; with few departments popSize may exceed
+        # the n! orderings, and the population then repeats some of them
+        if n_departments == 1:
+            raise AdmissionError('At least 2 departments are required', 400)
+        cost = estimate_cost(pop_size, generations, n_departments)
+        if cost > MAX_JOB_COST:
+            raise AdmissionError(f'Job too large (estimated cost {cost} > {MAX_JOB_COST}); '
+                                 'reduce popSize or generations', 400)
+        return cost
+
+    def admit(self, user_id, cost):
+        """
+        Reserve a concurrency slot and charge cost to the user's quota; raises AdmissionError(429).
+        Returns the charge, which release() can refund if the job never runs.
+        """
+        now = time.monotonic()
+        with self._lock:
+            charges = self._charges.setdefault(user_id, deque())
+            while charges and charges[0][0] < now - self.window_seconds:
+                charges.popleft()
+            if self._running.get(user_id, 0) >= self.max_concurrent:
+                raise AdmissionError(f'Too many concurrent optimizations (limit {self.max_concurrent})')
+            used = sum(charge for _, charge in charges)
+            if used + cost > self.quota:
+                raise AdmissionError('Compute quota exceeded; try again later')
+            charge = (now, cost)
+            charges.append(charge)
+            self._running[user_id] = self._running.get(user_id, 0) + 1
+            return charge
+
+    def release(self, user_id, refund=None):
+        """Free the user's concurrency slot; refund is a charge from admit() to take back"""
+        with self._lock:
+            if refund is not None:
+                try:
+                    self._charges.get(user_id, deque()).remove(refund)
+                except ValueError:
+                    pass
+            remaining = self._running.get(user_id, 0) - 1
+            if remaining > 0:
+                self._running[user_id] = remaining
+            else:
+                self._running.pop(user_id, None)
+
+    @contextmanager
+    def slot(self, user_id, cost):
+        self.admit(user_id, cost)
+        try:
+            yield
+        finally:
+            self.release(user_id)
+
+class BackgroundJobs:
+    """
+    Bounded queue of heavy optimization jobs run on a small thread pool.
+    Jobs are polled by id; finished jobs expire after JOB_TTL_SECONDS.
+    """
+
+    def __init__(self, workers=BACKGROUND_WORKERS, queue_size=BACKGROUND_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='optimize-job')
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._pending = 0
+
+    def submit(self, user_id, fn, *args, on_done=None, run_as=None, **kwargs):
+        """
+        Queue fn(*args, **kwargs); returns the job id or raises AdmissionError(429) when full.
+        run_as reuses a given job id (e.g. a checkpoint's) unless that job is still unfinished.
+        """
+        with self._lock:
+            self._expire()
+            existing = self._jobs.get(run_as)
+            if existing is not None and existing['finished_at'] is None:
+                raise AdmissionError('This job is already queued or running', status=409)
+            if self._pending >= self.queue_size:
+                raise AdmissionError('Optimization queue is full; try again later')
+            self._pending += 1
+            job_id = run_as or uuid.uuid4().hex
+            self._jobs[job_id] = {'user_id': user_id, 'status': 'queued', 'result': None,
+                                  'error': None, 'finished_at': None}
+
+        def run():
+            self._update(job_id, status='running')
+            try:
+                result = fn(*args, **kwargs)
+                self._update(job_id, status='done', result=result)
+            except Exception as e:
+                logger.exception("Background optimization job %s failed", job_id)
+                self._update(job_id, status='failed', error=str(e))
+            finally:
+                with self._lock:
+                    self._pending -= 1
+                    self._jobs[job_id]['finished_at'] = time.monotonic()
+                if on_done:
+                    on_done()
+
+        self._executor.submit(run)
+        return job_id
+
+    def get(self, job_id, user_id):
+        """Return a copy of the user's job, or None"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job['user_id'] != user_id:
+                return None
+            return dict(job)
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def _expire(self):
+        cutoff = time.monotonic() - JOB_TTL_SECONDS
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job['finished_at'] is not None and job['finished_at'] < cutoff]:
+            del self._jobs[job_id]
+
+admission_controller = AdmissionController()
+background_jobs = BackgroundJobs()
@@ -0,0 +1,156 @@
+from urllib.parse import parse_qsl
+
+from asgiref.sync import ThreadSensitiveContext
+from asgiref.wsgi import WsgiToAsgi
+from flask_jwt_extended import decode_token
+from jwt import ExpiredSignatureError
+
+from server import app
+from database import storage
+from telemetry import get_logger
+from responses import (
+    COMPRESS_MIN_BYTES,
+    choose_encoding,
+    compress_body,
+    history_options,
+    shape_history
+)
+from async_database import (
+    async_db_instance,
+    async_user_model,
+    async_department_area_model,
+    async_relationship_matrix_model,
+    async_optimization_result_model
+)
+
+logger = get_logger(__name__)
+
+# ASGI entry point (see serve.py). The read-only GET endpoints are served natively
+# with the async Mongo driver; everything else falls through to the Flask app.
+
+class ThreadedWsgiToAsgi(WsgiToAsgi):
+    """WsgiToAsgi that runs each request on a thread of its own"""
+
+    async def __call__(self, scope, receive, send):
+        # asgiref runs WSGI apps on one shared thread by default (thread_sensitive=True),
+        # which would queue every Flask request behind a running /optimize; inside a
+        # ThreadSensitiveContext that "shared" thread is private to this request
+        async with ThreadSensitiveContext():
+            await super().__call__(scope, receive, send)
+
+flask_app = ThreadedWsgiToAsgi(app)
+
+class AuthError(Exception):
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+def jwt_identity(scope):
+    """
+    Identity of the request's Bearer access token, verified with the Flask app's JWT settings.
+    Raises AuthError with the status and message flask_jwt_extended would answer with.
+    """
+    headers = dict(scope.get('headers') or [])
+    auth_header = headers.get(b'authorization', b'').decode('latin-1')
+    if not auth_header:
+        raise AuthError('Missing Authorization Header', 401)
+    parts = auth_header.split()
+    if len(parts) != 2 or parts[0] != 'Bearer':
+        raise AuthError("Bad Authorization header. Expected 'Authorization: Bearer <JWT>'", 422)
+
+    try:
+        with app.app_context():
+            decoded = decode_token(parts[1])
+    except ExpiredSignatureError:
+        raise AuthError('Token has expired', 401)
+    except Exception as e:
+        raise AuthError(str(e), 422)
+    if decoded.get('type') != 'access':
+        raise AuthError('Only non-refresh tokens are allowed', 422)
+    return decoded[app.config['JWT_IDENTITY_CLAIM']]
+
+async def send_json(scope, send, payload, status=200):
+    # app.json keeps the output identical to jsonify (datetimes, ordering)
+    body = app.json.dumps(payload).encode('utf-8')
+    headers = [
+        (b'content-type', b'application/json'),
+        (b'access-control-allow-origin', b'*'),
+        (b'vary', b'Accept-Encoding'),
+    ]
+    # Same compression rules as the Flask app's after_request hook
+    encoding = choose_encoding(dict(scope.get('headers') or []).get(b'accept-encoding', b'').decode('latin-1'))
+    if encoding and len(body) >= COMPRESS_MIN_BYTES:
+        body = compress_body(body, encoding)
+        headers.append((b'content-encoding', encoding.encode('ascii')))
+    headers.append((b'content-length', str(len(body)).encode('ascii')))
+
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+async def get_profile(user_id, args):
+    result = await async_user_model.get_user_by_id(user_id)
+    return result, 200 if result['success'] else 404
+
+async def get_department_areas(user_id, args):
+    return await async_department_area_model.get_user_department_areas(user_id), 200
+
+async def get_relationship_matrices(user_id, args):
+    compact, _ = history_options(args)
+    result = await async_relationship_matrix_model.get_user_relationship_matrices(user_id)
+    if result['success']:
+        shape_history(result['relationship_matrices'], compact=compact)
+    return result, 200
+
+async def get_optimization_results(user_id, args):
+    compact, include_images = history_options(args)
+    result = await async_optimization_result_model.get_user_optimization_results(
+        user_id, include_images=include_images
+    )
+    if result['success']:
+        shape_history(result['optimization_results'], compact=compact, include_images=include_images)
+    return result, 200
+
+# path -> (handler, error message prefix); all are GET and require a JWT.
+# The async models read MongoDB directly; with an embedded backend (sqlite, memory)
+# these reads are local and cheap, so the Flask routes serve them instead.
+ASYNC_ROUTES = {
+    '/api/profile': (get_profile, 'Profile error'),
+    '/api/get-department-areas': (get_department_areas, 'Error fetching department areas'),
+    '/api/get-relationship-matrices': (get_relationship_matrices, 'Error fetching relationship matrices'),
+    '/api/get-optimization-results': (get_optimization_results, 'Error fetching optimization results'),
+} if storage.name == 'mongodb' else {}
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await async_db_instance.close()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+
+    route = ASYNC_ROUTES.get(scope.get('path')) if scope['type'] == 'http' else None
+    if route is None or scope['method'] != 'GET':
+        await flask_app(scope, receive, send)
+        return
+
+    handler, error_prefix = route
+    try:
+        user_id = jwt_identity(scope)
+    except AuthError as e:
+        await send_json(scope, send, {'msg': e.message}, e.status)
+        return
+    try:
+        args = dict(parse_qsl(scope.get('query_string', b'').decode('latin-1')))
+        payload, status = await handler(user_id, args)
+    except Exception as e:
+        logger.exception("Error in async handler for %s", scope['path'])
+        payload, status = {'success': False, 'message': f'{error_prefix}: {str(e)}'}, 500
+    await send_json(scope, send, payload, status)
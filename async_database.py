@@ -0,0 +1,142 @@
+import os
+import functools
+from pymongo import AsyncMongoClient
+from dotenv import load_dotenv
+from bson import ObjectId
+
+from telemetry import get_logger, DB_OPERATION_SECONDS
+from database import user_profile_cache
+from versioning import input_refs, attach_inputs
+
+# Load environment variables
+load_dotenv()
+
+logger = get_logger(__name__)
+
+def track_latency(method):
+    """Async counterpart of database.track_latency"""
+    name = method.__qualname__
+
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        with DB_OPERATION_SECONDS.time(method=name):
+            return await method(*args, **kwargs)
+    return wrapper
+
+class AsyncDatabase:
+    """
+    AsyncMongoClient used by the ASGI read endpoints.
+    The client binds to the event loop it is first used on, so it connects lazily.
+    """
+
+    def __init__(self):
+        self.client = None
+        self._db = None
+
+    @property
+    def db(self):
+        if self._db is None:
+            mongodb_uri = os.getenv('MONGODB_URI')
+            database_name = os.getenv('DATABASE_NAME', 'smartgrid_plannerx_db')
+
+            if not mongodb_uri:
+                raise ValueError("MONGODB_URI not found in environment variables")
+
+            self.client = AsyncMongoClient(mongodb_uri)
+            self._db = self.client[database_name]
+            logger.info("Async MongoDB client created for database: %s", database_name)
+        return self._db
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
+            self._db = None
+
+async def _recent_for_user(collection, user_id, limit, projection=None):
+    """Newest documents of a user, with _id as a string"""
+    cursor = collection.find({"user_id": user_id}, projection).sort([("created_at", -1), ("_id", -1)]).limit(limit)
+    documents = []
+    async for document in cursor:
+        document['_id'] = str(document['_id'])
+        documents.append(document)
+    return documents
+
+async def _rehydrate(db, documents):
+    """Async counterpart of InputDocumentModel.rehydrate"""
+    refs = list(input_refs(documents))
+    inputs_by_ref = {}
+    if refs:
+        async for document in db.input_documents.find({"_id": {"$in": refs}}):
+            inputs_by_ref[document["_id"]] = document["data"]
+    return attach_inputs(documents, inputs_by_ref)
+
+class AsyncUserModel:
+    def __init__(self, database):
+        self.database = database
+
+    @track_latency
+    async def get_user_by_id(self, user_id):
+        """Get user by ID (shares the sync model's profile cache)"""
+        try:
+            cached = user_profile_cache.get(user_id)
+            if cached is not None:
+                return {"success": True, "user": cached}
+            user = await self.database.db.users.find_one({"_id": ObjectId(user_id)})
+            if user:
+                user['_id'] = str(user['_id'])
+                del user['password']  # Never return password
+                user_profile_cache.put(user['_id'], user)
+                return {"success": True, "user": user}
+            return {"success": False, "message": "User not found"}
+        except Exception as e:
+            return {"success": False, "message": f"Error fetching user: {str(e)}"}
+
+class AsyncDepartmentAreaModel:
+    def __init__(self, database):
+        self.database = database
+
+    @track_latency
+    async def get_user_department_areas(self, user_id, limit=10):
+        """Get department areas for a user"""
+        try:
+            areas = await _recent_for_user(self.database.db.department_areas, user_id, limit)
+            areas = await _rehydrate(self.database.db, areas)
+            return {"success": True, "department_areas": areas}
+        except Exception as e:
+            return {"success": False, "message": f"Error fetching department areas: {str(e)}"}
+
+class AsyncRelationshipMatrixModel:
+    def __init__(self, database):
+        self.database = database
+
+    @track_latency
+    async def get_user_relationship_matrices(self, user_id, limit=10):
+        """Get relationship matrices for a user"""
+        try:
+            matrices = await _recent_for_user(self.database.db.relationship_matrices, user_id, limit)
+            matrices = await _rehydrate(self.database.db, matrices)
+            return {"success": True, "relationship_matrices": matrices}
+        except Exception as e:
+            return {"success": False, "message": f"Error fetching relationship matrices: {str(e)}"}
+
+class AsyncOptimizationResultModel:
+    def __init__(self, database):
+        self.database = database
+
+    @track_latency
+    async def get_user_optimization_results(self, user_id, limit=10, include_images=True):
+        """Get optimization results for a user; include_images=False leaves out the plot images"""
+        try:
+            projection = None if include_images else {"result_data.plotImage": 0}
+            results = await _recent_for_user(self.database.db.optimization_results, user_id, limit, projection)
+            results = await _rehydrate(self.database.db, results)
+            return {"success": True, "optimization_results": results}
+        except Exception as e:
+            return {"success": False, "message": f"Error fetching optimization results: {str(e)}"}
+
+async_db_instance = AsyncDatabase()
+async_user_model = AsyncUserModel(async_db_instance)
+async_department_area_model = AsyncDepartmentAreaModel(async_db_instance)
+async_relationship_matrix_model = AsyncRelationshipMatrixModel(async_db_instance)
+async_optimization_result_model = AsyncOptimizationResultModel(async_db_instance)
@@ -0,0 +1,114 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from python_script import (
+    run_facility_layout_optimization,
+    build_department_index,
+    plot_layout_base64,
+)
+from telemetry import PhaseTimer
+
+# Upper bound on scenarios accepted by one batch request
+MAX_BATCH_SCENARIOS = int(os.getenv('MAX_BATCH_SCENARIOS', 50))
+# Worker processes shared by all batch requests (and pooled /optimize runs)
+BATCH_WORKERS = int(os.getenv('BATCH_WORKERS', os.cpu_count() or 2))
+
+_executor = None
+
+def get_batch_executor():
+    """Lazily create the process pool that runs batch scenarios"""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=BATCH_WORKERS)
+    return _executor
+
+def _run_with_report(fn, params):
+    report = {}
+    return fn(**params, report=report), report
+
+def run_in_pool(fn, **params):
+    """
+    Runs fn(**params, report=report) in the worker pool and waits for it, so a long
+    GA run does not hold the calling process's GIL.
+    Returns (fn's result, report); the worker's report dict is not shared with the caller.
+    """
+    return get_batch_executor().submit(_run_with_report, fn, params).result()
+
+def run_scenario(params, render=False):
+    """
+    Runs one scenario in a worker process.
+    params are keyword arguments for run_facility_layout_optimization.
+    Returns a result_data dict in the same shape /optimize stores.
+    """
+    report = {}
+    best_seq, best_pos, best_score, history = run_facility_layout_optimization(**params, report=report)
+    timer = PhaseTimer()
+    timer.timings.update(report.get('timings', {}))
+
+    img_base64 = None
+    if render and best_pos:
+        with timer.phase('render'):
+            img_base64 = plot_layout_base64(best_pos, title=f"Optimal Layout (Score: {best_score:.0f})")
+
+    return {
+        'bestSequence': best_seq,
+        'bestScore': best_score if best_score > -float('inf') else 0,
+        'plotImage': img_base64,
+        'success': best_seq is not None,
+        'timings': timer.timings,
+        'stats': report.get('stats', {})
+    }
+
+def when_all_done(futures, callback):
+    """Calls callback once every future has finished or been cancelled (at once if there are none)"""
+    pending = len(futures)
+    lock = threading.Lock()
+
+    def done(_):
+        nonlocal pending
+        with lock:
+            pending -= 1
+            last = pending == 0
+        if last:
+            callback()
+
+    if not futures:
+        callback()
+    for future in futures:
+        future.add_done_callback(done)
+
+def run_batch(scenario_params, renders=None, on_done=None):
+    """
+    Submits every scenario to the worker pool and yields (index, result_data)
+    as each one finishes, in completion order.
+    renders[i] says whether scenario i's best layout is rendered (default: none are).
+    Scenarios over the same department names share one department index.
+    A failing scenario yields a result_data with success False and an error message.
+    When the generator is closed early (e.g. the client went away), scenarios that have
+    not started are cancelled. on_done is called once the last submitted scenario has
+    finished or been cancelled, which may be after the generator is closed.
+    """
+    futures = {}
+    try:
+        indexes = {}
+        for params in scenario_params:
+            names = tuple(params['department_areas_info'].keys())
+            if names not in indexes:
+                indexes[names] = build_department_index(names)
+            params['department_index'] = indexes[names]
+
+        executor = get_batch_executor()
+        for i, params in enumerate(scenario_params):
+            futures[executor.submit(run_scenario, params, bool(renders and renders[i]))] = i
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                yield i, future.result()
+            except Exception as e:
+                yield i, {'success': False, 'message': f'Error during optimization: {str(e)}'}
+    finally:
+        for future in futures:
+            future.cancel()
+        if on_done is not None:
+            when_all_done(futures, on_done)
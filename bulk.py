@@ -0,0 +1,154 @@
+import os
+import io
+import csv
+import json
+from itertools import groupby
+
+# Records written per insert_many / read per cursor batch
+IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', 500))
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 500))
+
+BULK_KINDS = ('department-areas', 'relationship-matrices', 'optimization-results')
+BULK_FORMATS = ('ndjson', 'csv')
+
+# Required fields of an imported record, per kind
+RECORD_FIELDS = {
+    'department-areas': (('department_data', dict),),
+    'relationship-matrices': (('relationship_data', list),),
+    'optimization-results': (('department_data', dict), ('relationship_data', list), ('result_data', dict)),
+}
+
+class BulkFormatError(ValueError):
+    """Malformed import data; the message names the offending line"""
+
+def request_format(fmt, content_type):
+    """'csv' or 'ndjson' from an explicit ?format= or the Content-Type (NDJSON by default)"""
+    if fmt:
+        return fmt.lower()
+    return 'csv' if 'csv' in (content_type or '') else 'ndjson'
+
+def iter_text_lines(stream):
+    """Decode a binary line stream (e.g. request.stream) lazily, dropping a UTF-8 BOM"""
+    first = True
+    for raw in stream:
+        line = raw.decode('utf-8')
+        if first:
+            line = line.lstrip('\ufeff')
+            first = False
+        yield line
+
+def _number(value, line_num):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise BulkFormatError(f"Line {line_num}: area '{value}' is not a number")
+    return int(number) if number.is_integer() else number
+
+def _csv_rows(lines, required):
+    reader = csv.DictReader(lines)
+    missing = [column for column in required if column not in (reader.fieldnames or [])]
+    if missing:
+        raise BulkFormatError(f"CSV header must include {', '.join(required)} (missing {', '.join(missing)})")
+    for row in reader:
+        yield reader.line_num, row
+
+def parse_department_csv(lines):
+    """
+    Rows of `design,department,area`; consecutive rows with the same design form one
+    department_data record (without a design column the whole file is one record).
+    """
+    rows = _csv_rows(lines, ('department', 'area'))
+    for _, group in groupby(rows, key=lambda numbered: numbered[1].get('design')):
+        department_data = {}
+        for line_num, row in group:
+            department_data[row['department']] = _number(row['area'], line_num)
+        yield {'department_data': department_data}
+
+def parse_relationship_csv(lines):
+    """Rows of `design,department_1,department_2,rel_code`, grouped by design like parse_department_csv"""
+    rows = _csv_rows(lines, ('department_1', 'department_2', 'rel_code'))
+    for _, group in groupby(rows, key=lambda numbered: numbered[1].get('design')):
+        yield {'relationship_data': [[row['department_1'], row['department_2'], row['rel_code']]
+                                     for _, row in group]}
+
+def parse_ndjson(lines):
+    """One JSON record per line; blank lines are skipped"""
+    for line_num, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raise BulkFormatError(f"Line {line_num}: invalid JSON ({e})")
+        if not isinstance(record, dict):
+            raise BulkFormatError(f"Line {line_num}: expected a JSON object")
+        yield record
+
+def read_records(kind, fmt, lines):
+    """Validated import records of kind from text lines in fmt; raises BulkFormatError"""
+    if fmt == 'ndjson':
+        records = parse_ndjson(lines)
+    elif fmt == 'csv' and kind == 'department-areas':
+        records = parse_department_csv(lines)
+    elif fmt == 'csv' and kind == 'relationship-matrices':
+        records = parse_relationship_csv(lines)
+    else:
+        raise BulkFormatError(f"{kind} can only be imported as NDJSON")
+
+    for number, record in enumerate(records, 1):
+        for field, field_type in RECORD_FIELDS[kind]:
+            if not isinstance(record.get(field), field_type):
+                raise BulkFormatError(f"Record {number}: {field} must be a JSON {field_type.__name__}")
+        yield record
+
+def batched(items, size):
+    """Lists of up to size items, consumed lazily"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def render_ndjson(documents, dumps):
+    for document in documents:
+        yield dumps(document) + '\n'
+
+CSV_COLUMNS = {
+    'department-areas': ('design', 'version', 'created_at', 'department', 'area'),
+    'relationship-matrices': ('design', 'version', 'created_at', 'department_1', 'department_2', 'rel_code'),
+    'optimization-results': ('id', 'created_at', 'success', 'best_score', 'best_sequence',
+                             'department_data', 'relationship_data'),
+}
+
+def _csv_records(kind, document):
+    created_at = document.get('created_at')
+    created_at = created_at.isoformat() if hasattr(created_at, 'isoformat') else created_at
+    if kind == 'department-areas':
+        for department, area in (document.get('department_data') or {}).items():
+            yield (document['_id'], document.get('version'), created_at, department, area)
+    elif kind == 'relationship-matrices':
+        for rel_item in document.get('relationship_data') or []:
+            if len(rel_item) == 3:
+                yield (document['_id'], document.get('version'), created_at, *rel_item)
+    else:
+        result_data = document.get('result_data') or {}
+        yield (document['_id'], created_at, result_data.get('success'), result_data.get('bestScore'),
+               json.dumps(result_data.get('bestSequence')),
+               json.dumps(document.get('department_data')), json.dumps(document.get('relationship_data')))
+
+def render_csv(kind, documents):
+    """CSV text chunks, one per document: one row per department / relationship / result"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS[kind])
+    for document in documents:
+        for row in _csv_records(kind, document):
+            writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.getvalue():
+        yield buffer.getvalue()
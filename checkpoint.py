@@ -0,0 +1,204 @@
+import os
+import re
+import json
+import time
+import tempfile
+import threading
+from datetime import datetime, timezone
+
+import numpy as np
+
+from telemetry import get_logger
+
+logger = get_logger(__name__)
+
+# Long single-objective runs write a checkpoint every CHECKPOINT_EVERY generations
+# (and after the last one) so they can be resumed, or extended, by job id.
+CHECKPOINT_DIR = os.getenv('CHECKPOINT_DIR', os.path.join(tempfile.gettempdir(), 'smartgrid_checkpoints'))
+CHECKPOINT_EVERY = int(os.getenv('CHECKPOINT_EVERY', 10))
+# A run's checkpoint is deleted when it completes; those of failed or interrupted runs
+# are kept for resuming until they have not been written for CHECKPOINT_TTL_SECONDS
+CHECKPOINT_TTL_SECONDS = int(os.getenv('CHECKPOINT_TTL_SECONDS', 7 * 86400))
+
+_JOB_ID = re.compile(r'^[0-9a-f]{32}$')
+
+def checkpoint_paths(job_id):
+    """(metadata .json, GA state .npz) paths of a job, or None if job_id is not a valid id"""
+    if not _JOB_ID.match(job_id or ''):
+        return None
+    base = os.path.join(CHECKPOINT_DIR, job_id)
+    return f"{base}.json", f"{base}.npz"
+
+def _last_written(paths):
+    # mtime of the newest existing file of a job, or None if it has none
+    times = [os.path.getmtime(path) for path in paths if os.path.exists(path)]
+    return max(times) if times else None
+
+def _replace_atomically(path, write):
+    # Readers never see a half-written checkpoint: write a sibling file, then rename it
+    os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=CHECKPOINT_DIR, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def save_checkpoint_job(job_id, user_id, request_data):
+    """Record who owns a checkpointed run and the /optimize payload needed to resume it"""
+    prune_checkpoints()
+    meta_path, _ = checkpoint_paths(job_id)
+    meta = {
+        'user_id': user_id,
+        'request': request_data,
+        'updated_at': datetime.now(timezone.utc).isoformat(),
+    }
+    _replace_atomically(meta_path, lambda f: f.write(json.dumps(meta).encode('utf-8')))
+
+def load_checkpoint_job(job_id, user_id):
+    """The job's metadata if it exists and belongs to user_id, else None"""
+    paths = checkpoint_paths(job_id)
+    if not paths or not os.path.exists(paths[0]):
+        return None
+    if _last_written(paths) < time.time() - CHECKPOINT_TTL_SECONDS:
+        return None
+    with open(paths[0], 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    return meta if meta.get('user_id') == user_id else None
+
+def delete_checkpoint(job_id):
+    """Remove a job's checkpoint files (once its run has completed)"""
+    for path in checkpoint_paths(job_id) or ():
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def prune_checkpoints():
+    """Delete the checkpoints in CHECKPOINT_DIR not written for CHECKPOINT_TTL_SECONDS"""
+    cutoff = time.time() - CHECKPOINT_TTL_SECONDS
+    try:
+        names = os.listdir(CHECKPOINT_DIR)
+    except FileNotFoundError:
+        return
+    for name in names:
+        job_id, ext = os.path.splitext(name)
+        try:
+            if ext == '.tmp':
+                # Left behind by a process that died mid-write
+                if os.path.getmtime(os.path.join(CHECKPOINT_DIR, name)) < cutoff:
+                    os.remove(os.path.join(CHECKPOINT_DIR, name))
+            elif ext in ('.json', '.npz') and _JOB_ID.match(job_id):
+                # A job's files go together, once the newer of them has expired
+                last_written = _last_written(checkpoint_paths(job_id))
+                if last_written is not None and last_written < cutoff:
+                    delete_checkpoint(job_id)
+        except FileNotFoundError:
+            pass  # Pruned concurrently
+
+def _score(value):
+    # Scores are stored as float64; integral ones are ints again, as the GA produced them
+    return int(value) if value.is_integer() else value
+
+def save_checkpoint_state(job_id, dept_list_names, state):
+    """
+    Write the GA state of a generation as a compressed .npz. Sequences are stored as
+    int16 department indices; the Mersenne Twister state of the random module as uint32.
+    state: generation, population, fitnesses, history, best_sequence, best_score, rng_state
+    and optionally parameters, the GA's adapted settings and counters as a JSON-able dict,
+    trajectory, the adaptive parameter history (JSON-able list), hall_of_fame,
+    HallOfFame.entries() (stored as sequences and scores only), and fitness_cache and
+    layout_cache, the GA's scored (sequence, fitness) pairs.
+    """
+    _, state_path = checkpoint_paths(job_id)
+    index = {dept: i for i, dept in enumerate(dept_list_names)}
+
+    def sequences(rows):
+        return np.array([[index[dept] for dept in row] for row in rows],
+                        dtype=np.int16).reshape(-1, len(dept_list_names))
+
+    rng_version, rng_internal, rng_gauss = state['rng_state']
+    arrays = {
+        'departments': np.array(dept_list_names, dtype=str),
+        'generation': np.int64(state['generation']),
+        'population': np.array([[index[dept] for dept in sequence] for sequence in state['population']],
+                               dtype=np.int16),
+        'fitnesses': np.asarray(state['fitnesses'], dtype=np.float64),
+        'history': np.asarray(state['history'], dtype=np.float64),
+        'best_sequence': np.array([index[dept] for dept in state['best_sequence'] or []], dtype=np.int16),
+        'best_score': np.float64(state['best_score']),
+        'rng_version': np.int64(rng_version),
+        'rng_internal': np.array(rng_internal, dtype=np.uint32),
+        'rng_gauss': np.array([] if rng_gauss is None else [rng_gauss], dtype=np.float64),
+        'parameters': np.array(json.dumps(state.get('parameters') or {})),
+        'trajectory': np.array(json.dumps(state.get('trajectory') or [])),
+        'hall_sequences': sequences(entry['sequence'] for entry in state.get('hall_of_fame') or []),
+        'hall_scores': np.array([entry['score'] for entry in state.get('hall_of_fame') or []],
+                                dtype=np.float64),
+    }
+    for name in ('fitness_cache', 'layout_cache'):
+        cache = state.get(name) or []
+        arrays[f'{name}_sequences'] = sequences(sequence for sequence, _ in cache)
+        arrays[f'{name}_scores'] = np.array([fitness for _, fitness in cache], dtype=np.float64)
+    _replace_atomically(state_path, lambda f: np.savez_compressed(f, **arrays))
+    logger.debug("Checkpoint %s written at generation %d", job_id, state['generation'])
+
+def load_checkpoint_state(job_id):
+    """The state saved by save_checkpoint_state (sequences as department names), or None"""
+    paths = checkpoint_paths(job_id)
+    if not paths or not os.path.exists(paths[1]):
+        return None
+    with np.load(paths[1]) as arrays:
+        departments = arrays['departments'].tolist()
+        rng_gauss = arrays['rng_gauss'].tolist()
+
+        def scored(name):
+            # [(sequence, score), ...] of a pair of *_sequences / *_scores arrays
+            if f'{name}_sequences' not in arrays.files:
+                return []
+            return [([departments[i] for i in row], _score(score))
+                    for row, score in zip(arrays[f'{name}_sequences'].tolist(),
+                                          arrays[f'{name}_scores'].tolist())]
+
+        return {
+            'dept_list_names': departments,
+            'generation': int(arrays['generation']),
+            'population': [[departments[i] for i in row] for row in arrays['population'].tolist()],
+            'fitnesses': [_score(value) for value in arrays['fitnesses'].tolist()],
+            'history': [_score(value) for value in arrays['history'].tolist()],
+            'best_sequence': [departments[i] for i in arrays['best_sequence'].tolist()] or None,
+            'best_score': _score(float(arrays['best_score'])),
+            'rng_state': (int(arrays['rng_version']), tuple(arrays['rng_internal'].tolist()),
+                          rng_gauss[0] if rng_gauss else None),
+            'parameters': json.loads(str(arrays['parameters'])) if 'parameters' in arrays.files else {},
+            'trajectory': json.loads(str(arrays['trajectory'])) if 'trajectory' in arrays.files else [],
+            'hall_of_fame': [{'sequence': sequence, 'score': score} for sequence, score in scored('hall')],
+            'fitness_cache': scored('fitness_cache'),
+            'layout_cache': scored('layout_cache'),
+        }
+
+class RunningCheckpoints:
+    """
+    Job ids with a checkpointed run in progress in this process, so each checkpoint
+    has a single writer: a job cannot be resumed while it is still running.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._job_ids = set()
+
+    def claim(self, job_id):
+        """Mark job_id as running; returns False if it already is"""
+        with self._lock:
+            if job_id in self._job_ids:
+                return False
+            self._job_ids.add(job_id)
+            return True
+
+    def release(self, job_id):
+        with self._lock:
+            self._job_ids.discard(job_id)
+
+running_checkpoints = RunningCheckpoints()
@@ -1,82 +1,130 @@
 import os
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure
+import time
+import functools
+import threading
 from dotenv import load_dotenv
 from datetime import datetime
 import bcrypt
 from bson import ObjectId
 
+from telemetry import get_logger, DB_OPERATION_SECONDS, CACHE_LOOKUPS, CACHE_HITS
+from storage import DuplicateKeyError, create_storage
+from bulk import IMPORT_BATCH_SIZE, EXPORT_BATCH_SIZE, BulkFormatError, batched
+from versioning import (
+    content_hash,
+    diff_departments,
+    diff_relationships,
+    input_refs,
+    attach_inputs
+)
+
 # Load environment variables
 load_dotenv()
 
-class Database:
-    def __init__(self):
-        self.client = None
-        self.db = None
-        self.connect()
-    
-    def connect(self):
-        """Connect to MongoDB Atlas"""
-        try:
-            mongodb_uri = os.getenv('MONGODB_URI')
-            database_name = os.getenv('DATABASE_NAME', 'smartgrid_plannerx_db')
-            
-            if not mongodb_uri:
-                raise ValueError("MONGODB_URI not found in environment variables")
-            
-            self.client = MongoClient(mongodb_uri)
-            self.db = self.client[database_name]
-            
-            # Test the connection
-            self.client.admin.command('ping')
-            print(f"✅ Successfully connected to MongoDB Atlas database: {database_name}")
-            
-            # Create indexes for better performance
-            self.create_indexes()
-            
-        except ConnectionFailure as e:
-            print(f"❌ Failed to connect to MongoDB: {e}")
-            raise
-        except Exception as e:
-            print(f"❌ Database connection error: {e}")
-            raise
-    
-    def create_indexes(self):
-        """Create database indexes for better performance"""
-        try:
-            # User collection indexes
-            self.db.users.create_index("email", unique=True)
-            self.db.users.create_index("created_at")
-            
-            # Department areas collection indexes
-            self.db.department_areas.create_index("user_id")
-            self.db.department_areas.create_index("created_at")
-            
-            # Relationship matrix collection indexes
-            self.db.relationship_matrices.create_index("user_id")
-            self.db.relationship_matrices.create_index("created_at")
-            
-            # Optimization results collection indexes
-            self.db.optimization_results.create_index("user_id")
-            self.db.optimization_results.create_index("created_at")
-            
-            print("✅ Database indexes created successfully")
-        except Exception as e:
-            print(f"⚠️ Warning: Could not create indexes: {e}")
+logger = get_logger(__name__)
+
+# bcrypt cost factor for new hashes; stored hashes with another cost are rehashed on login
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))
+# How long a user profile is served from memory after it was read (0 disables the cache)
+USER_CACHE_TTL_SECONDS = float(os.getenv('USER_CACHE_TTL_SECONDS', 30))
+USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', 10000))
+
+def track_latency(method):
+    """Record the latency of a model method in the db_operation_seconds histogram"""
+    name = method.__qualname__
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with DB_OPERATION_SECONDS.time(method=name):
+            return method(*args, **kwargs)
+    return wrapper
+
+def create_indexes(storage):
+    """Create database indexes for better performance"""
+    try:
+        # User collection indexes
+        storage.users.create_index("email", unique=True)
+        storage.users.create_index("created_at")
+        
+        # Department areas collection indexes
+        storage.department_areas.create_index("user_id")
+        storage.department_areas.create_index("created_at")
+        
+        # Relationship matrix collection indexes
+        storage.relationship_matrices.create_index("user_id")
+        storage.relationship_matrices.create_index("created_at")
+        
+        # Input documents are keyed by content hash (_id), so they need no extra index
+        
+        # Optimization results collection indexes
+        storage.optimization_results.create_index("user_id")
+        storage.optimization_results.create_index("created_at")
+        
+        logger.info("Database indexes created successfully")
+    except Exception as e:
+        logger.warning("Could not create indexes: %s", e)
+
+class TTLCache:
+    """
+    Small thread-safe cache whose entries expire ttl_seconds after they were stored.
+    Lookups and hits are exported as cache_lookups_total / cache_hits_total{cache=name}.
+    Values are copied (dict) on the way in and out so callers cannot mutate cached entries.
+    """
+
+    def __init__(self, name, ttl_seconds, max_size):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries = {}  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        if self.ttl_seconds <= 0:
+            return None
+        CACHE_LOOKUPS.inc(cache=self.name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+        CACHE_HITS.inc(cache=self.name)
+        return dict(entry[1])
+
+    def put(self, key, value):
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            if len(self._entries) >= self.max_size:
+                # Drop expired entries first, then the oldest insertions
+                now = time.monotonic()
+                for stale in [k for k, (expires, _) in self._entries.items() if expires < now]:
+                    del self._entries[stale]
+                while len(self._entries) >= self.max_size:
+                    del self._entries[next(iter(self._entries))]
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, dict(value))
+
+# Profiles keyed by user id (the JWT identity), shared by the sync and async read paths
+user_profile_cache = TTLCache('user_profile', USER_CACHE_TTL_SECONDS, USER_CACHE_SIZE)
+
+def bcrypt_rounds(hashed_password):
+    """Cost factor of a bcrypt hash ($2b$12$... -> 12), or None if it cannot be read"""
+    try:
+        return int(hashed_password.split(b'$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
 
 class UserModel:
     def __init__(self, db):
         self.collection = db.users
     
+    @track_latency
     def create_user(self, email, password, name, role="user"):
         """Create a new user"""
         try:
-            # Check if user already exists
-            if self.collection.find_one({"email": email}):
-                return {"success": False, "message": "User already exists with this email"}
-            
             # Hash password
-            hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+            hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(BCRYPT_ROUNDS))
             
             user_data = {
                 "email": email,
@@ -87,16 +135,20 @@ class UserModel:
                 "updated_at": datetime.utcnow()
             }
             
-            result = self.collection.insert_one(user_data)
+            # The unique email index rejects duplicates, saving a find_one round trip
+            inserted_id = self.collection.insert_one(user_data)
             
             return {
                 "success": True,
-                "user_id": str(result.inserted_id),
+                "user_id": str(inserted_id),
                 "message": "User created successfully"
             }
+        except DuplicateKeyError:
+            return {"success": False, "message": "User already exists with this email"}
         except Exception as e:
             return {"success": False, "message": f"Error creating user: {str(e)}"}
     
+    @track_latency
     def authenticate_user(self, email, password):
         """Authenticate user login"""
         try:
@@ -106,137 +158,428 @@ class UserModel:
             
             # Check password
             if bcrypt.checkpw(password.encode('utf-8'), user['password']):
+                # Upgrade (or downgrade) the stored hash to the configured cost
+                if bcrypt_rounds(user['password']) != BCRYPT_ROUNDS:
+                    self._rehash_password(user['_id'], password)
                 # Remove password from response
                 user['_id'] = str(user['_id'])
                 del user['password']
+                # The client usually asks for its profile right after logging in
+                user_profile_cache.put(user['_id'], user)
                 return {"success": True, "user": user}
             else:
                 return {"success": False, "message": "Invalid email or password"}
         except Exception as e:
             return {"success": False, "message": f"Authentication error: {str(e)}"}
     
+    def _rehash_password(self, object_id, password):
+        """Store password hashed with BCRYPT_ROUNDS (optional - login succeeds even if this fails)"""
+        try:
+            hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(BCRYPT_ROUNDS))
+            self.collection.update_one(
+                {"_id": object_id},
+                {"$set": {"password": hashed_password, "updated_at": datetime.utcnow()}}
+            )
+        except Exception as e:
+            logger.warning("Could not rehash password: %s", e)
+    
+    @track_latency
     def get_user_by_id(self, user_id):
-        """Get user by ID"""
+        """Get user by ID (served from the profile cache for USER_CACHE_TTL_SECONDS)"""
         try:
+            cached = user_profile_cache.get(user_id)
+            if cached is not None:
+                return {"success": True, "user": cached}
             user = self.collection.find_one({"_id": ObjectId(user_id)})
             if user:
                 user['_id'] = str(user['_id'])
                 del user['password']  # Never return password
+                user_profile_cache.put(user['_id'], user)
                 return {"success": True, "user": user}
             return {"success": False, "message": "User not found"}
         except Exception as e:
             return {"success": False, "message": f"Error fetching user: {str(e)}"}
 
+class InputDocumentModel:
+    """Content-addressed department and relationship inputs, stored once per distinct content"""
+    
+    def __init__(self, db):
+        self.collection = db.input_documents
+    
+    @track_latency
+    def store_inputs(self, inputs):
+        """
+        Upsert [(kind, data), ...] keyed by content hash in one round trip.
+        Returns the hashes in input order; existing documents are left untouched.
+        """
+        refs = []
+        operations = {}
+        now = datetime.utcnow()
+        for kind, data in inputs:
+            ref = content_hash(kind, data)
+            refs.append(ref)
+            if ref not in operations:
+                operations[ref] = (
+                    {"_id": ref},
+                    {"$setOnInsert": {"kind": kind, "data": data, "created_at": now}}
+                )
+        self.collection.bulk_upsert(list(operations.values()))
+        return refs
+    
+    @track_latency
+    def load_inputs(self, refs):
+        """{hash: data} for the given input hashes"""
+        refs = list(set(refs))
+        if not refs:
+            return {}
+        return {document["_id"]: document["data"]
+                for document in self.collection.find({"_id": {"$in": refs}})}
+    
+    def rehydrate(self, documents):
+        """Fill in the inputs of documents stored by reference (one query for all of them)"""
+        return attach_inputs(documents, self.load_inputs(input_refs(documents)))
+
+def save_input_version(collection, inputs, user_id, kind, data_field, ref_field, data, diff):
+    """
+    Append data to the user's version chain in collection unless it equals the latest version.
+    Each version references its content by hash and records `changes` from the previous version.
+    Returns (id, version, created).
+    """
+    ref = inputs.store_inputs([(kind, data)])[0]
+    latest = collection.find_one({"user_id": user_id}, sort=[("created_at", -1), ("_id", -1)])
+    if latest is not None and (latest.get(ref_field) == ref or latest.get(data_field) == data):
+        return str(latest["_id"]), latest.get("version", 1), False
+    
+    previous = None
+    if latest is not None:
+        previous = inputs.rehydrate([latest])[0].get(data_field)
+    version = latest.get("version", 1) + 1 if latest is not None else 1
+    inserted_id = collection.insert_one({
+        "user_id": user_id,
+        ref_field: ref,
+        "version": version,
+        "changes": diff(previous, data),
+        "created_at": datetime.utcnow()
+    })
+    return str(inserted_id), version, True
+
+def import_input_versions(collection, inputs, user_id, kind, data_field, ref_field, records, diff,
+                          batch_size=IMPORT_BATCH_SIZE):
+    """
+    Append a stream of records ({data_field: data}) to the user's version chain with one
+    input upsert and one insert_many per batch. Records equal to their predecessor are skipped.
+    Returns (imported, unchanged); imported counts are exact even if the stream fails midway.
+    """
+    latest = collection.find_one({"user_id": user_id}, sort=[("created_at", -1), ("_id", -1)])
+    previous = inputs.rehydrate([latest])[0].get(data_field) if latest is not None else None
+    version = latest.get("version", 1) if latest is not None else 0
+    counts = {"imported": 0, "unchanged": 0}
+    
+    for batch in batched((record[data_field] for record in records), batch_size):
+        refs = inputs.store_inputs([(kind, data) for data in batch])
+        now = datetime.utcnow()
+        documents = []
+        for ref, data in zip(refs, batch):
+            if data == previous:
+                counts["unchanged"] += 1
+                continue
+            version += 1
+            documents.append({
+                "user_id": user_id,
+                ref_field: ref,
+                "version": version,
+                "changes": diff(previous, data),
+                "created_at": now
+            })
+            previous = data
+        if documents:
+            # ObjectIds are generated in order, so _id breaks created_at ties within a batch
+            collection.insert_many(documents)
+            counts["imported"] += len(documents)
+        yield counts
+
+def iter_user_documents(collection, inputs, user_id, projection=None, batch_size=EXPORT_BATCH_SIZE):
+    """All of a user's documents, oldest first, read and rehydrated batch_size at a time"""
+    cursor = collection.find({"user_id": user_id}, projection,
+                             sort=[("created_at", 1), ("_id", 1)], batch_size=batch_size)
+    for batch in batched(cursor, batch_size):
+        for document in batch:
+            document['_id'] = str(document['_id'])
+        yield from inputs.rehydrate(batch)
+
+def run_import(records_import, description):
+    """Drain an import generator into a {"success", "imported", "unchanged"} result"""
+    counts = {"imported": 0, "unchanged": 0}
+    try:
+        for counts in records_import:
+            pass
+        return {"success": True, **counts, "message": f"{counts['imported']} {description} imported"}
+    except BulkFormatError as e:
+        return {"success": False, "invalid": True, **counts,
+                "message": f"{e} ({counts['imported']} {description} imported before the error)"}
+    except Exception as e:
+        return {"success": False, **counts, "message": f"Error importing {description}: {str(e)}"}
+
 class DepartmentAreaModel:
     def __init__(self, db):
         self.collection = db.department_areas
+        self.inputs = InputDocumentModel(db)
     
+    @track_latency
     def save_department_areas(self, user_id, department_data):
-        """Save department areas for a user"""
+        """Save department areas for a user as a new version (unless unchanged)"""
         try:
-            data = {
-                "user_id": user_id,
-                "department_data": department_data,
-                "created_at": datetime.utcnow()
-            }
-            
-            result = self.collection.insert_one(data)
+            inserted_id, version, created = save_input_version(
+                self.collection, self.inputs, user_id, "departments",
+                "department_data", "department_ref", department_data, diff_departments
+            )
             return {
                 "success": True,
-                "id": str(result.inserted_id),
-                "message": "Department areas saved successfully"
+                "id": inserted_id,
+                "version": version,
+                "message": "Department areas saved successfully" if created else "Department areas unchanged"
             }
         except Exception as e:
             return {"success": False, "message": f"Error saving department areas: {str(e)}"}
     
+    @track_latency
     def get_user_department_areas(self, user_id, limit=10):
-        """Get department areas for a user"""
+        """Get department areas for a user (newest versions first)"""
         try:
-            cursor = self.collection.find({"user_id": user_id}).sort("created_at", -1).limit(limit)
+            cursor = self.collection.find({"user_id": user_id}, sort=[("created_at", -1), ("_id", -1)], limit=limit)
             areas = []
             for area in cursor:
                 area['_id'] = str(area['_id'])
                 areas.append(area)
             
-            return {"success": True, "department_areas": areas}
+            return {"success": True, "department_areas": self.inputs.rehydrate(areas)}
         except Exception as e:
             return {"success": False, "message": f"Error fetching department areas: {str(e)}"}
+    
+    @track_latency
+    def import_department_areas(self, user_id, records):
+        """Import a stream of {"department_data": ...} records as new versions, in batches"""
+        return run_import(import_input_versions(
+            self.collection, self.inputs, user_id, "departments",
+            "department_data", "department_ref", records, diff_departments
+        ), "department area versions")
+    
+    def iter_user_department_areas(self, user_id):
+        """Every department areas version of a user, oldest first (lazy, for streaming exports)"""
+        return iter_user_documents(self.collection, self.inputs, user_id)
 
 class RelationshipMatrixModel:
     def __init__(self, db):
         self.collection = db.relationship_matrices
+        self.inputs = InputDocumentModel(db)
     
+    @track_latency
     def save_relationship_matrix(self, user_id, relationship_data):
-        """Save relationship matrix for a user"""
+        """Save relationship matrix for a user as a new version (unless unchanged)"""
         try:
-            data = {
-                "user_id": user_id,
-                "relationship_data": relationship_data,
-                "created_at": datetime.utcnow()
-            }
-            
-            result = self.collection.insert_one(data)
+            inserted_id, version, created = save_input_version(
+                self.collection, self.inputs, user_id, "relationships",
+                "relationship_data", "relationship_ref", relationship_data, diff_relationships
+            )
             return {
                 "success": True,
-                "id": str(result.inserted_id),
-                "message": "Relationship matrix saved successfully"
+                "id": inserted_id,
+                "version": version,
+                "message": "Relationship matrix saved successfully" if created else "Relationship matrix unchanged"
             }
         except Exception as e:
             return {"success": False, "message": f"Error saving relationship matrix: {str(e)}"}
     
+    @track_latency
     def get_user_relationship_matrices(self, user_id, limit=10):
-        """Get relationship matrices for a user"""
+        """Get relationship matrices for a user (newest versions first)"""
         try:
-            cursor = self.collection.find({"user_id": user_id}).sort("created_at", -1).limit(limit)
+            cursor = self.collection.find({"user_id": user_id}, sort=[("created_at", -1), ("_id", -1)], limit=limit)
             matrices = []
             for matrix in cursor:
                 matrix['_id'] = str(matrix['_id'])
                 matrices.append(matrix)
             
-            return {"success": True, "relationship_matrices": matrices}
+            return {"success": True, "relationship_matrices": self.inputs.rehydrate(matrices)}
         except Exception as e:
             return {"success": False, "message": f"Error fetching relationship matrices: {str(e)}"}
+    
+    @track_latency
+    def import_relationship_matrices(self, user_id, records):
+        """Import a stream of {"relationship_data": ...} records as new versions, in batches"""
+        return run_import(import_input_versions(
+            self.collection, self.inputs, user_id, "relationships",
+            "relationship_data", "relationship_ref", records, diff_relationships
+        ), "relationship matrix versions")
+    
+    def iter_user_relationship_matrices(self, user_id):
+        """Every relationship matrix version of a user, oldest first (lazy, for streaming exports)"""
+        return iter_user_documents(self.collection, self.inputs, user_id)
 
 class OptimizationResultModel:
     def __init__(self, db):
         self.collection = db.optimization_results
+        self.inputs = InputDocumentModel(db)
     
+    @track_latency
     def save_optimization_result(self, user_id, department_data, relationship_data, result_data):
-        """Save optimization result for a user"""
+        """Save optimization result for a user; the inputs are stored once and referenced by hash"""
         try:
+            department_ref, relationship_ref = self.inputs.store_inputs(
+                [("departments", department_data), ("relationships", relationship_data)]
+            )
             data = {
                 "user_id": user_id,
-                "department_data": department_data,
-                "relationship_data": relationship_data,
+                "department_ref": department_ref,
+                "relationship_ref": relationship_ref,
                 "result_data": result_data,
                 "created_at": datetime.utcnow()
             }
             
-            result = self.collection.insert_one(data)
+            inserted_id = self.collection.insert_one(data)
             return {
                 "success": True,
-                "id": str(result.inserted_id),
+                "id": str(inserted_id),
                 "message": "Optimization result saved successfully"
             }
         except Exception as e:
             return {"success": False, "message": f"Error saving optimization result: {str(e)}"}
     
-    def get_user_optimization_results(self, user_id, limit=10):
-        """Get optimization results for a user"""
+    @track_latency
+    def save_optimization_results(self, user_id, entries):
+        """Save several optimization results for a user with a single insert_many"""
+        try:
+            if not entries:
+                return {"success": True, "ids": [], "message": "No optimization results to save"}
+            
+            now = datetime.utcnow()
+            # One upsert round trip for every distinct input of the batch
+            refs = self.inputs.store_inputs([
+                input_item for entry in entries
+                for input_item in (("departments", entry["department_data"]),
+                                   ("relationships", entry["relationship_data"]))
+            ])
+            documents = [{
+                "user_id": user_id,
+                "department_ref": refs[2 * i],
+                "relationship_ref": refs[2 * i + 1],
+                "result_data": entry["result_data"],
+                "created_at": now
+            } for i, entry in enumerate(entries)]
+            
+            inserted_ids = self.collection.insert_many(documents)
+            return {
+                "success": True,
+                "ids": [str(inserted_id) for inserted_id in inserted_ids],
+                "message": f"{len(documents)} optimization results saved successfully"
+            }
+        except Exception as e:
+            return {"success": False, "message": f"Error saving optimization results: {str(e)}"}
+    
+    @track_latency
+    def get_user_optimization_results(self, user_id, limit=10, include_images=True):
+        """Get optimization results for a user; include_images=False leaves out the plot images"""
         try:
-            cursor = self.collection.find({"user_id": user_id}).sort("created_at", -1).limit(limit)
+            projection = None if include_images else {"result_data.plotImage": 0}
+            cursor = self.collection.find({"user_id": user_id}, projection,
+                                          sort=[("created_at", -1), ("_id", -1)], limit=limit)
             results = []
             for result in cursor:
                 result['_id'] = str(result['_id'])
                 results.append(result)
             
-            return {"success": True, "optimization_results": results}
+            return {"success": True, "optimization_results": self.inputs.rehydrate(results)}
         except Exception as e:
             return {"success": False, "message": f"Error fetching optimization results: {str(e)}"}
+    
+    @track_latency
+    def import_optimization_results(self, user_id, records, batch_size=IMPORT_BATCH_SIZE):
+        """Import a stream of {department_data, relationship_data, result_data} records in batches"""
+        def import_batches():
+            counts = {"imported": 0, "unchanged": 0}
+            for batch in batched(records, batch_size):
+                saved = self.save_optimization_results(user_id, batch)
+                if not saved["success"]:
+                    raise RuntimeError(saved["message"])
+                counts["imported"] += len(saved["ids"])
+                yield counts
+        return run_import(import_batches(), "optimization results")
+    
+    def iter_user_optimization_results(self, user_id, include_images=True):
+        """Every optimization result of a user, oldest first (lazy, for streaming exports)"""
+        projection = None if include_images else {"result_data.plotImage": 0}
+        return iter_user_documents(self.collection, self.inputs, user_id, projection)
+    
+    @track_latency
+    def get_optimization_plot(self, user_id, result_id):
+        """Get the base64 PNG plot of one of the user's optimization results"""
+        try:
+            result = self.collection.find_one(
+                {"_id": ObjectId(result_id), "user_id": user_id},
+                {"result_data.plotImage": 1}
+            )
+            plot_image = ((result or {}).get("result_data") or {}).get("plotImage")
+            if not plot_image:
+                return {"success": False, "message": "Plot not found"}
+            return {"success": True, "plot_image": plot_image}
+        except Exception as e:
+            return {"success": False, "message": f"Error fetching plot: {str(e)}"}
+    
+    @track_latency
+    def get_top_layout(self, user_id, result_id, rank):
+        """Get the rank-th (1 = best) top layout stored with one of the user's optimization results"""
+        try:
+            result = self.collection.find_one(
+                {"_id": ObjectId(result_id), "user_id": user_id},
+                {"result_data.topLayouts": 1}
+            )
+            top_layouts = ((result or {}).get("result_data") or {}).get("topLayouts") or []
+            if not 1 <= rank <= len(top_layouts):
+                return {"success": False, "message": "Layout not found"}
+            return {"success": True, "layout": top_layouts[rank - 1]}
+        except Exception as e:
+            return {"success": False, "message": f"Error fetching layout: {str(e)}"}
+    
+    @track_latency
+    def get_warm_start_sequences(self, user_id, department_names, k=5, min_similarity=0.5, scan_limit=50):
+        """Get the user's top K stored best sequences for the same or a similar department set"""
+        try:
+            wanted = set(department_names)
+            cursor = self.collection.find(
+                {"user_id": user_id, "result_data.success": True},
+                {"department_data": 1, "department_ref": 1,
+                 "result_data.bestSequence": 1, "result_data.bestScore": 1},
+                sort=[("created_at", -1)], limit=scan_limit
+            )
+            
+            # Department sets are loaded once per distinct input hash
+            candidates = []
+            for result in self.inputs.rehydrate(list(cursor)):
+                sequence = result.get("result_data", {}).get("bestSequence")
+                stored = set(result.get("department_data") or {})
+                if not sequence or not (wanted | stored):
+                    continue
+                # Jaccard similarity of the department name sets
+                similarity = len(wanted & stored) / len(wanted | stored)
+                if similarity >= min_similarity:
+                    candidates.append((similarity, result["result_data"].get("bestScore", 0), sequence))
+            
+            candidates.sort(key=lambda c: (c[0], c[1]), reverse=True)
+            sequences = []
+            for _, _, sequence in candidates:
+                if sequence not in sequences:
+                    sequences.append(sequence)
+                if len(sequences) >= k:
+                    break
+            
+            return {"success": True, "sequences": sequences}
+        except Exception as e:
+            return {"success": False, "message": f"Error fetching warm-start sequences: {str(e)}"}
 
-# Initialize database connection
-db_instance = Database()
-user_model = UserModel(db_instance.db)
-department_area_model = DepartmentAreaModel(db_instance.db)
-relationship_matrix_model = RelationshipMatrixModel(db_instance.db)
-optimization_result_model = OptimizationResultModel(db_instance.db)
+# Initialize storage (see storage.STORAGE_BACKEND)
+storage = create_storage()
+create_indexes(storage)
+user_model = UserModel(storage)
+department_area_model = DepartmentAreaModel(storage)
+relationship_matrix_model = RelationshipMatrixModel(storage)
+optimization_result_model = OptimizationResultModel(storage)
@@ -0,0 +1,285 @@
+import random
+
+import numpy as np
+
+from python_script import (
+    initialize_population,
+    crossover,
+    mutate,
+    place_layout,
+    calculate_fitness_sparse,
+    prepare_layout_problem,
+    build_layout_symmetry,
+    canonical_layout_key,
+)
+from telemetry import get_logger, PhaseTimer
+
+logger = get_logger(__name__)
+
+# Objective vector used for layouts that could not be placed (all minimized)
+INFEASIBLE_OBJECTIVES = (1e9, 1e9, 1e9)
+
+OBJECTIVE_NAMES = ('adjacency_score', 'exposed_perimeter', 'flow_distance')
+
+def layout_perimeter(positions):
+    """
+    Counts the cell edges of the occupied area that are not shared with another
+    occupied cell. Lower means a more compact footprint.
+    """
+    occupied = {cell for cells in positions.values() for cell in cells}
+    exposed = 0
+    for (r, c) in occupied:
+        for neighbor in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+            if neighbor not in occupied:
+                exposed += 1
+    return exposed
+
+def flow_distance(positions, relation_csr):
+    """
+    Sum over related pairs of weight * Manhattan distance between department centroids.
+    Negative (X) weights reward keeping undesirable pairs apart.
+    """
+    names = relation_csr['names']
+    index = relation_csr['index']
+    indptr = relation_csr['indptr']
+    indices = relation_csr['indices']
+    weights = relation_csr['weights']
+
+    centroids = {
+        dept: (sum(r for r, _ in cells) / len(cells), sum(c for _, c in cells) / len(cells))
+        for dept, cells in positions.items()
+    }
+
+    total = 0.0
+    for d1, (r1, c1) in centroids.items():
+        i = index.get(d1)
+        if i is None:
+            continue
+        for k in range(indptr[i], indptr[i + 1]):
+            other = centroids.get(names[indices[k]])
+            if other is not None:
+                total += weights[k] * (abs(r1 - other[0]) + abs(c1 - other[1]))
+    return total
+
+def evaluate_objectives(positions, relation_csr):
+    """
+    Returns the objective vector of a layout, every component to be minimized:
+    (-adjacency score, exposed perimeter, flow distance).
+    """
+    if positions is None:
+        return INFEASIBLE_OBJECTIVES
+    return (
+        -calculate_fitness_sparse(positions, relation_csr),
+        layout_perimeter(positions),
+        flow_distance(positions, relation_csr),
+    )
+
+def fast_non_dominated_sort(objectives):
+    """
+    Deb's fast non-dominated sort on an (n, m) array of minimized objectives.
+    The pairwise domination matrix is built in one vectorized step.
+    Returns a list of fronts, each an array of row indices; front 0 is Pareto-optimal.
+    """
+    objectives = np.asarray(objectives, dtype=float)
+    less_equal = np.all(objectives[:, None, :] <= objectives[None, :, :], axis=2)
+    strictly_less = np.any(objectives[:, None, :] < objectives[None, :, :], axis=2)
+    dominates = less_equal & strictly_less  # dominates[i, j]: i dominates j
+
+    domination_count = dominates.sum(axis=0)
+    assigned = np.zeros(len(objectives), dtype=bool)
+    fronts = []
+    current = np.flatnonzero(domination_count == 0)
+    while current.size:
+        fronts.append(current)
+        assigned[current] = True
+        domination_count = domination_count - dominates[current].sum(axis=0)
+        current = np.flatnonzero((domination_count == 0) & ~assigned)
+    return fronts
+
+def crowding_distance(objectives):
+    """
+    Crowding distance of every row of an (n, m) objective array belonging to one front.
+    Boundary solutions of each objective get infinite distance.
+    """
+    objectives = np.asarray(objectives, dtype=float)
+    n, m = objectives.shape
+    distance = np.zeros(n)
+    if n <= 2:
+        distance[:] = np.inf
+        return distance
+
+    order = np.argsort(objectives, axis=0)
+    for k in range(m):
+        sorted_values = objectives[order[:, k], k]
+        span = sorted_values[-1] - sorted_values[0]
+        distance[order[0, k]] = np.inf
+        distance[order[-1, k]] = np.inf
+        if span > 0:
+            distance[order[1:-1, k]] += (sorted_values[2:] - sorted_values[:-2]) / span
+    return distance
+
+def rank_population(objectives):
+    """
+    Returns (rank, crowding) arrays for the whole population.
+    """
+    objectives = np.asarray(objectives, dtype=float)
+    rank = np.empty(len(objectives), dtype=int)
+    crowding = np.empty(len(objectives))
+    for front_index, front in enumerate(fast_non_dominated_sort(objectives)):
+        rank[front] = front_index
+        crowding[front] = crowding_distance(objectives[front])
+    return rank, crowding
+
+def crowded_tournament(rank, crowding):
+    """
+    Binary tournament: lower rank wins, ties go to the less crowded individual.
+    """
+    i, j = random.sample(range(len(rank)), 2)
+    if rank[i] != rank[j]:
+        return i if rank[i] < rank[j] else j
+    return i if crowding[i] >= crowding[j] else j
+
+def nsga2(dept_list_names, grid_values_map, relation_csr, initial_sequence,
+          pop_size=50, generations=100, mutation_rate=0.2, constraints=None,
+          seed_sequences=None, stats=None, symmetry=None):
+    """
+    NSGA-II over placement sequences, reusing the GA's crossover and mutation operators.
+    Returns the final Pareto front as a list of dicts (sequence, positions and objectives),
+    best adjacency score first.
+    If stats (dict) is given it receives generations and evaluations.
+    With symmetry (from build_layout_symmetry), equivalent layouts (mirror images,
+    swapped interchangeable departments) count as duplicates; all objectives are
+    invariant under both.
+    """
+    population = initialize_population(dept_list_names, initial_sequence, pop_size, seed_sequences)
+
+    evaluations = 0
+
+    def evaluate(sequences):
+        nonlocal evaluations
+        evaluations += len(sequences)
+        positions_list = []
+        objectives = []
+        keys = []
+        for sequence in sequences:
+            grid, positions = place_layout(sequence, grid_values_map, constraints)
+            positions_list.append(positions)
+            objectives.append(evaluate_objectives(positions, relation_csr))
+            layout_key = canonical_layout_key(grid, symmetry) if symmetry is not None else None
+            keys.append(layout_key if layout_key is not None else tuple(sequence))
+        return positions_list, np.array(objectives, dtype=float), keys
+
+    positions_list, objectives, keys = evaluate(population)
+    rank, crowding = rank_population(objectives)
+
+    for gen in range(generations):
+        offspring = []
+        while len(offspring) < pop_size:
+            parent1 = population[crowded_tournament(rank, crowding)]
+            parent2 = population[crowded_tournament(rank, crowding)]
+            offspring.append(mutate(crossover(parent1, parent2), mutation_rate))
+        offspring_positions, offspring_objectives, offspring_keys = evaluate(offspring)
+
+        # Elitist environmental selection over parents + offspring
+        combined = population + offspring
+        combined_positions = positions_list + offspring_positions
+        combined_objectives = np.vstack([objectives, offspring_objectives])
+        combined_keys = keys + offspring_keys
+
+        # Duplicate (or equivalent) layouts only compete once, so copies cannot flood the front
+        unique, duplicates, seen = [], [], set()
+        for i, key in enumerate(combined_keys):
+            (duplicates if key in seen else unique).append(i)
+            seen.add(key)
+        unique = np.array(unique)
+
+        survivors = []
+        for front in fast_non_dominated_sort(combined_objectives[unique]):
+            front = unique[front]
+            if len(survivors) + len(front) <= pop_size:
+                survivors.extend(front.tolist())
+                continue
+            distance = crowding_distance(combined_objectives[front])
+            remaining = pop_size - len(survivors)
+            survivors.extend(front[np.argsort(-distance, kind='stable')[:remaining]].tolist())
+            break
+        survivors.extend(duplicates[:pop_size - len(survivors)])
+
+        population = [combined[i] for i in survivors]
+        positions_list = [combined_positions[i] for i in survivors]
+        keys = [combined_keys[i] for i in survivors]
+        objectives = combined_objectives[survivors]
+        rank, crowding = rank_population(objectives)
+
+        if gen % 10 == 0 or gen == generations - 1:
+            logger.debug("Generation %3d | Pareto front size = %d", gen, int((rank == 0).sum()))
+
+    if stats is not None:
+        stats.update(generations=generations, evaluations=evaluations)
+
+    front = []
+    seen = set()
+    for i in np.flatnonzero(rank == 0):
+        if positions_list[i] is None or keys[i] in seen:
+            continue
+        seen.add(keys[i])
+        front.append({
+            'sequence': list(population[i]),
+            'positions': positions_list[i],
+            'adjacency_score': -objectives[i, 0],
+            'exposed_perimeter': objectives[i, 1],
+            'flow_distance': objectives[i, 2],
+        })
+    front.sort(key=lambda entry: entry['adjacency_score'], reverse=True)
+    return front
+
+def run_pareto_optimization(department_areas_info, relationship_definitions,
+                            initial_user_sequence, pop_size=50, generations=100,
+                            mutation_rate=0.2, constraints=None, seed_sequences=None, report=None):
+    """
+    Multi-objective counterpart of run_facility_layout_optimization.
+    Trades adjacency score against compactness (exposed perimeter of the
+    occupied cells) and flow distance (weight * centroid distance) in one run.
+
+    report (dict), if given, receives timings ({"parse": ms, "ga": ms}), stats and
+    infeasible like run_facility_layout_optimization's.
+
+    Returns:
+        list: Pareto-optimal layouts (see nsga2), or [] if no solution is found.
+    """
+    logger.info("SmartGrid PlannerX Pareto optimization started")
+
+    timer = PhaseTimer()
+    stats = {}
+    if report is not None:
+        report['timings'] = timer.timings
+        report['stats'] = stats
+
+    with timer.phase('parse'):
+        problem = prepare_layout_problem(department_areas_info, relationship_definitions,
+                                         initial_user_sequence, constraints, seed_sequences)
+    if problem is None:
+        return []
+    symmetry = build_layout_symmetry(problem['dept_list_names'], problem['grid_values_map'],
+                                     problem['relation_dict_weights'], problem['constraints'])
+
+    logger.info("Running NSGA-II (Pop: %s, Gen: %s, MutRate: %s)", pop_size, generations, mutation_rate)
+    with timer.phase('ga'):
+        front = nsga2(
+            dept_list_names=problem['dept_list_names'],
+            grid_values_map=problem['grid_values_map'],
+            relation_csr=problem['relation_csr'],
+            initial_sequence=problem['initial_sequence'],
+            pop_size=pop_size,
+            generations=generations,
+            mutation_rate=mutation_rate,
+            constraints=problem['constraints'],
+            seed_sequences=problem['seed_sequences'],
+            stats=stats,
+            symmetry=symmetry
+        )
+
+    logger.info("NSGA-II finished: %d Pareto-optimal layouts", len(front), extra={'fields': timer.timings})
+    if not front and problem['constraints'] is not None and report is not None:
+        report['infeasible'] = True
+    return front
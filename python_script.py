@@ -1,12 +1,28 @@
 import numpy as np
 import matplotlib.pyplot as plt
+import math
 import random
+import heapq
+import base64
+import logging
 from io import BytesIO # For potential web integration (saving plot to buffer)
 
+from tcr import tcr_analysis
+from checkpoint import CHECKPOINT_EVERY, save_checkpoint_state
+from telemetry import get_logger, log_sampled, PhaseTimer, RunProfiler, PLOT_RENDER_SECONDS
+
+logger = get_logger(__name__)
+
 # Fixed grid size (can be adjusted if needed)
 GRID_ROWS = 5
 GRID_COLS = 5
 
+# Max entries of the per-run sequence -> fitness cache in genetic_algorithm
+FITNESS_CACHE_SIZE = 10000
+# Re-mutations tried per child before a layout equivalent to one already in the
+# next generation is accepted anyway
+DIVERSITY_RETRIES = 3
+
 # --- Core Algorithm Functions (mostly unchanged from your original code) ---
 
 def are_adjacent(cell1, cell2):
@@ -50,7 +66,8 @@ def place_departments(sequence, grid_values_map):
         gv = grid_values_map.get(dept) # Use .get() for safety if dept not in map
         if gv is None:
             # This case should ideally not happen if inputs are consistent
-            print(f"Warning: Department '{dept}' from sequence not found in grid_values_map. Skipping.")
+            log_sampled(logger, logging.WARNING, 'placement.unknown_dept',
+                        "Department '%s' from sequence not found in grid_values_map. Skipping.", dept)
             continue
         placed = False
 
@@ -121,6 +138,156 @@ def place_departments(sequence, grid_values_map):
 
     return grid, positions
 
+def normalize_constraints(constraints, dept_list_names, grid_values_map):
+    """
+    Validates user supplied hard constraints:
+      - fixed_cells:  {dept_name: [ (r,c), ... ]} cells a department must occupy
+      - not_adjacent: [ (d1, d2), ... ] pairs that must not share an edge
+      - perimeter:    [ dept_name, ... ] departments that must touch the grid border
+    Unknown departments and out-of-grid or overlapping cells are skipped with a warning.
+    Returns a dict with keys fixed_cells, not_adjacent ({dept: set(partners)}) and
+    perimeter (set), or None if no usable constraint remains.
+    """
+    if not constraints:
+        return None
+
+    known = set(dept_list_names)
+    fixed_cells = {}
+    taken = set()
+    for dept, cells in (constraints.get('fixed_cells') or {}).items():
+        if dept not in known:
+            logger.warning("Unknown department in fixed cells: %s. Skipping.", dept)
+            continue
+        cells = [tuple(cell) for cell in cells]
+        if not cells or any(not (0 <= r < GRID_ROWS and 0 <= c < GRID_COLS) for (r, c) in cells):
+            logger.warning("Fixed cells for '%s' are empty or outside the %dx%d grid. Skipping.", dept, GRID_ROWS, GRID_COLS)
+            continue
+        if taken.intersection(cells) or len(set(cells)) != len(cells):
+            logger.warning("Fixed cells for '%s' overlap another fixed department. Skipping.", dept)
+            continue
+        if len(cells) != grid_values_map.get(dept, 1):
+            logger.warning("'%s' is fixed to %d cell(s) but its area calls for %d.", dept, len(cells), grid_values_map.get(dept, 1))
+        fixed_cells[dept] = cells
+        taken.update(cells)
+
+    not_adjacent = {}
+    for pair in constraints.get('not_adjacent') or []:
+        if len(pair) != 2 or pair[0] not in known or pair[1] not in known or pair[0] == pair[1]:
+            logger.warning("Invalid not-adjacent pair: %s. Skipping.", pair)
+            continue
+        d1, d2 = pair
+        not_adjacent.setdefault(d1, set()).add(d2)
+        not_adjacent.setdefault(d2, set()).add(d1)
+
+    perimeter = set()
+    for dept in constraints.get('perimeter') or []:
+        if dept not in known:
+            logger.warning("Unknown department pinned to perimeter: %s. Skipping.", dept)
+            continue
+        perimeter.add(dept)
+
+    if not (fixed_cells or not_adjacent or perimeter):
+        return None
+
+    return {'fixed_cells': fixed_cells, 'not_adjacent': not_adjacent, 'perimeter': perimeter}
+
+def on_perimeter(cells):
+    """
+    Returns True if any of the cells lies on the outer border of the grid.
+    """
+    return any(r in (0, GRID_ROWS - 1) or c in (0, GRID_COLS - 1) for (r, c) in cells)
+
+def placement_feasible(dept, cells, positions, constraints):
+    """
+    Cheap hard-constraint check for one department that has just been placed.
+    Only looks at the department's own cells and its not-adjacent partners.
+    """
+    if dept in constraints['perimeter'] and not on_perimeter(cells):
+        return False
+    for other in constraints['not_adjacent'].get(dept, ()):
+        other_cells = positions.get(other)
+        if other_cells and cells_touch(cells, other_cells):
+            return False
+    return True
+
+def place_departments_constrained(sequence, grid_values_map, constraints):
+    """
+    Like place_departments, but honours normalized constraints (see normalize_constraints):
+      - fixed departments are put on their cells first and skipped in the sequence
+      - the remaining departments fill the free cells in row-major order from the top
+        row (no vertical centering, so the border rows stay usable)
+      - a perimeter-pinned department whose next free cells are inside the grid takes
+        the first free border cells after them instead (wrapping around), leaving the
+        skipped cells to the departments that follow
+      - placement stops at the first department that breaks a perimeter or
+        not-adjacent constraint, so infeasible layouts never reach scoring
+    Returns (grid, positions), or (None, None) if the layout is infeasible.
+    """
+    grid = [[None for _ in range(GRID_COLS)] for _ in range(GRID_ROWS)]
+    positions = {}
+
+    for dept, cells in constraints['fixed_cells'].items():
+        for (r, c) in cells:
+            grid[r][c] = dept
+        positions[dept] = list(cells)
+    for dept, cells in positions.items():
+        if not placement_feasible(dept, cells, positions, constraints):
+            return None, None
+
+    def free_cells(start, gv, border_only=False):
+        # (cursor just past them, cells) of the first free slot for gv at or after start
+        for cursor in range(start, GRID_ROWS * GRID_COLS):
+            r, c = divmod(cursor, GRID_COLS)
+            if gv == 2:
+                cells = [(r, c), (r, c + 1)] if c <= GRID_COLS - 2 else None
+            else:
+                cells = [(r, c)]
+            if (cells and all(grid[cr][cc] is None for (cr, cc) in cells)
+                    and (not border_only or on_perimeter(cells))):
+                return cursor + len(cells), cells
+        return None, None
+
+    cursor = 0
+    for dept in sequence:
+        if dept in positions:
+            continue
+        gv = grid_values_map.get(dept)
+        if gv is None:
+            log_sampled(logger, logging.WARNING, 'placement.unknown_dept',
+                        "Department '%s' from sequence not found in grid_values_map. Skipping.", dept)
+            continue
+
+        next_cursor, cells = free_cells(cursor, gv)
+        if cells is None:
+            return None, None  # Cannot place this department
+        if dept in constraints['perimeter'] and not on_perimeter(cells):
+            # Jump to a border slot; the cursor stays, so the skipped cells are filled next
+            _, cells = free_cells(cursor, gv, border_only=True)
+            if cells is None:
+                _, cells = free_cells(0, gv, border_only=True)
+            if cells is None:
+                return None, None
+        else:
+            cursor = next_cursor
+
+        for (r, c) in cells:
+            grid[r][c] = dept
+        positions[dept] = cells
+
+        if not placement_feasible(dept, cells, positions, constraints):
+            return None, None
+
+    return grid, positions
+
+def place_layout(sequence, grid_values_map, constraints=None):
+    """
+    Places a sequence with place_departments_constrained when normalized constraints
+    are given, otherwise with place_departments.
+    """
+    if constraints is not None:
+        return place_departments_constrained(sequence, grid_values_map, constraints)
+    return place_departments(sequence, grid_values_map)
+
 def calculate_fitness(positions, relation_dict_weights):
     """
     Given:
@@ -128,6 +295,7 @@ def calculate_fitness(positions, relation_dict_weights):
       - relation_dict_weights: { (d1,d2): weight, ... } (symmetric)
     For each unordered pair (d1, d2):
       - If any cell of d1 is adjacent to any cell of d2, add weight once.
+        Weights may be negative (X = undesirable), which penalizes the layout.
     Returns sum of weights. If positions is None, returns a large negative penalty.
     """
     if positions is None:
@@ -147,7 +315,7 @@ def calculate_fitness(positions, relation_dict_weights):
             # Get the weight for this pair, could be (d1, d2) or (d2, d1)
             weight = relation_dict_weights.get((d1, d2), relation_dict_weights.get((d2, d1), 0))
             
-            if weight == 0: # No defined positive relationship
+            if weight == 0: # No defined relationship
                 continue
 
             cells1 = positions.get(d1, [])
@@ -168,11 +336,176 @@ def calculate_fitness(positions, relation_dict_weights):
                 
     return score
 
+def build_department_index(dept_list_names):
+    """
+    Returns {dept_name: row} for dept_list_names.
+    Can be built once and shared by scenarios over the same department set.
+    """
+    return {name: i for i, name in enumerate(dept_list_names)}
 
-def initialize_population(dept_list_names, user_provided_sequence, pop_size=30):
+def build_relationship_csr(dept_list_names, relation_dict_weights, index=None):
+    """
+    Builds a sparse, CSR-style view of relation_dict_weights.
+    Each unordered pair with a nonzero weight is stored once, in the row of
+    whichever department comes first in dept_list_names.
+    Returns a dict:
+      - names:   department names in row order
+      - index:   {dept_name: row}
+      - indptr:  row i's neighbors are indices[indptr[i]:indptr[i+1]]
+      - indices: neighbor rows (always > the owning row)
+      - weights: weight of each stored (row, neighbor) entry
+    index (from build_department_index) is reused when given.
+    """
+    names = list(dept_list_names)
+    if index is None:
+        index = build_department_index(names)
+
+    rows = [{} for _ in names]
+    for (d1, d2), weight in relation_dict_weights.items():
+        if weight == 0 or d1 not in index or d2 not in index or d1 == d2:
+            continue
+        i, j = sorted((index[d1], index[d2]))
+        rows[i][j] = weight
+
+    indptr = [0]
+    indices = []
+    weights = []
+    for row in rows:
+        for j in sorted(row):
+            indices.append(j)
+            weights.append(row[j])
+        indptr.append(len(indices))
+
+    return {
+        'names': names,
+        'index': index,
+        'indptr': indptr,
+        'indices': indices,
+        'weights': weights,
+    }
+
+def cells_touch(cells1, cells2):
+    """
+    Returns True if any cell in cells1 shares an edge with any cell in cells2.
+    """
+    for (r1, c1) in cells1:
+        for (r2, c2) in cells2:
+            if abs(r1 - r2) + abs(c1 - c2) == 1:
+                return True
+    return False
+
+def calculate_fitness_sparse(positions, relation_csr):
+    """
+    Same score as calculate_fitness, but only visits the pairs stored in
+    relation_csr (see build_relationship_csr) instead of every pair of
+    departments in the layout.
+    """
+    if positions is None:
+        return -1e9
+
+    names = relation_csr['names']
+    index = relation_csr['index']
+    indptr = relation_csr['indptr']
+    indices = relation_csr['indices']
+    weights = relation_csr['weights']
+
+    score = 0
+    for d1, cells1 in positions.items():
+        i = index.get(d1)
+        if i is None:
+            continue
+        for k in range(indptr[i], indptr[i + 1]):
+            cells2 = positions.get(names[indices[k]])
+            if cells2 and cells_touch(cells1, cells2):
+                score += weights[k]
+
+    return score
+
+# --- Layout symmetry ---
+
+EMPTY_CELL_LABEL = -1
+
+def build_layout_symmetry(dept_list_names, grid_values_map, relation_dict_weights, constraints=None):
+    """
+    Describes which layouts of a problem score identically, for canonical keys:
+      - departments with no nonzero relationship and no constraint are interchangeable
+        with each other when they have the same footprint (grid value)
+      - mirror images of the grid (left-right, top-bottom and both) score the same;
+        this is not used when departments have fixed cells, which pin the layout to the site
+    Returns a dict:
+      - labels: {dept_name: int}; row index for distinct departments, a shared negative
+                label per footprint for interchangeable ones
+      - mirror: whether mirror images are folded together
+    """
+    related = set()
+    for (d1, d2), weight in relation_dict_weights.items():
+        if weight != 0 and d1 != d2:
+            related.update((d1, d2))
+    if constraints is not None:
+        related.update(constraints['fixed_cells'])
+        related.update(constraints['not_adjacent'])
+        related.update(constraints['perimeter'])
+
+    labels = {}
+    for i, dept in enumerate(dept_list_names):
+        if dept in related:
+            labels[dept] = i
+        else:
+            labels[dept] = EMPTY_CELL_LABEL - grid_values_map.get(dept, 1)
+    return {
+        'labels': labels,
+        'mirror': constraints is None or not constraints['fixed_cells'],
+    }
+
+def sequence_key(sequence, symmetry):
+    """
+    Key shared by sequences that place into the same layout up to swapping
+    interchangeable departments. Needs no placement, so it is cheap enough
+    for cache lookups and duplicate checks.
+    """
+    labels = symmetry['labels']
+    return tuple(labels.get(dept, EMPTY_CELL_LABEL) for dept in sequence)
+
+def canonical_layout_key(grid, symmetry):
+    """
+    Canonical key of a placed grid: cells as labels (see build_layout_symmetry), taking
+    the smallest of the grid and its mirror images when mirroring is allowed.
+    Layouts with equal keys have equal fitness. Returns None for an infeasible (None) grid.
+    """
+    if grid is None:
+        return None
+    labels = symmetry['labels']
+    rows = [tuple(EMPTY_CELL_LABEL if dept is None else labels.get(dept, EMPTY_CELL_LABEL) for dept in row)
+            for row in grid]
+    key = tuple(rows)
+    if not symmetry['mirror']:
+        return key
+    flipped_lr = tuple(row[::-1] for row in rows)
+    return min(key, flipped_lr, key[::-1], flipped_lr[::-1])
+
+
+def repair_sequence(sequence, dept_list_names):
+    """
+    Makes a sequence from an older design fit the current departments:
+    unknown and repeated departments are dropped, missing ones are appended
+    in dept_list_names order.
+    Returns the repaired permutation of dept_list_names.
+    """
+    known = set(dept_list_names)
+    repaired = []
+    seen = set()
+    for dept in sequence or []:
+        if dept in known and dept not in seen:
+            repaired.append(dept)
+            seen.add(dept)
+    repaired.extend(dept for dept in dept_list_names if dept not in seen)
+    return repaired
+
+def initialize_population(dept_list_names, user_provided_sequence, pop_size=30, seed_sequences=None):
     """
     Generates pop_size permutations of dept_list_names.
-    Ensures that user_provided_sequence (if valid) is included as one individual.
+    Ensures that user_provided_sequence (if valid) is included as one individual,
+    followed by any valid seed_sequences (e.g. warm-start results), up to pop_size.
     Returns a list of permutations (each is a list).
     """
     population = []
@@ -181,14 +514,26 @@ def initialize_population(dept_list_names, user_provided_sequence, pop_size=30):
         set(user_provided_sequence) == set(dept_list_names) and 
         len(user_provided_sequence) == len(dept_list_names)):
         population.append(user_provided_sequence.copy())
-    else:
+    elif not seed_sequences:
         # If user sequence is invalid or not provided, add a random one to start
         population.append(random.sample(dept_list_names, len(dept_list_names)))
 
+    # 2) Seed sequences, skipping invalid ones and duplicates
+    for seed in seed_sequences or []:
+        if len(population) >= pop_size:
+            break
+        if (set(seed) == set(dept_list_names) and len(seed) == len(dept_list_names)
+                and list(seed) not in population):
+            population.append(list(seed))
+
 
-    # 2) Fill the rest with random permutations
+    # 3) Fill the rest with random permutations
+    distinct_permutations = math.factorial(len(dept_list_names))
     while len(population) < pop_size:
         perm = random.sample(dept_list_names, len(dept_list_names))
+        if len(population) >= distinct_permutations:
+            population.append(perm)  # Every ordering is taken; repeats are unavoidable
+            continue
         # Ensure uniqueness in the initial population
         is_duplicate = False
         for p_existing in population:
@@ -248,54 +593,322 @@ def select_parents(population, fitnesses, tournament_size=4):
     return parents[0], parents[1]
 
 
+class HallOfFame:
+    """
+    The size best distinct layouts seen during a run. Entries sit in a min-heap on score
+    next to a set of their canonical_layout_keys, so offering a layout that does not beat
+    the worst entry costs one comparison and anything else O(log size).
+    On equal scores the layout found first is kept.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._heap = []  # (score, -arrival, key, sequence, positions)
+        self._keys = set()
+        self._arrivals = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def offer(self, score, key, sequence, positions):
+        """Add a scored layout; returns True if it entered the hall. Infeasible (key None) layouts never do."""
+        if key is None or self.size <= 0:
+            return False
+        full = len(self._heap) >= self.size
+        if full and score <= self._heap[0][0]:
+            return False
+        if key in self._keys:
+            return False
+
+        self._arrivals += 1
+        entry = (score, -self._arrivals, key, list(sequence), positions)
+        if full:
+            evicted = heapq.heapreplace(self._heap, entry)
+            self._keys.discard(evicted[2])
+        else:
+            heapq.heappush(self._heap, entry)
+        self._keys.add(key)
+        return True
+
+    def entries(self):
+        """Best first: [{"sequence", "positions", "score"}, ...]"""
+        return [{'sequence': sequence, 'positions': positions, 'score': score}
+                for score, _, _, sequence, positions in sorted(self._heap, reverse=True)]
+
+# Adaptive parameter control (genetic_algorithm(adaptive=True))
+ADAPTIVE_MUTATION_BOUNDS = (0.05, 0.8)
+ADAPTIVE_TOURNAMENT_MAX = 8
+# An evaluation budget may grow the population up to this multiple of pop_size
+# (a tight budget ends the run early instead: thinner populations converged worse)
+ADAPTIVE_POP_GROWTH = 2.0
+# Generations without a new best after which the run counts as stagnating
+STAGNATION_GENERATIONS = 5
+# Share of distinct layouts below which the population counts as converged
+LOW_DIVERSITY = 0.5
+
+def population_diversity(population, fitnesses, symmetry):
+    """(share of distinct layouts by sequence_key, fitness standard deviation) of a scored generation"""
+    distinct = len({sequence_key(sequence, symmetry) for sequence in population}) / len(population)
+    finite = [fitness for fitness in fitnesses if np.isfinite(fitness)]
+    return distinct, float(np.std(finite)) if finite else 0.0
+
+def adapt_parameters(mutation_rate, tournament_size, base_mutation_rate,
+                     diversity, fitness_std, stagnant_for):
+    """
+    Next generation's (mutation_rate, tournament_size). A stagnating or converged
+    population gets more mutation; while the run improves, mutation decays back to
+    base_mutation_rate and selection pressure (tournament size) rises.
+    """
+    low_rate, high_rate = ADAPTIVE_MUTATION_BOUNDS
+    if stagnant_for >= STAGNATION_GENERATIONS or diversity < LOW_DIVERSITY or fitness_std == 0:
+        return min(high_rate, mutation_rate * 1.5), tournament_size
+    if stagnant_for == 0:
+        return (max(low_rate, (mutation_rate + base_mutation_rate) / 2.0),
+                min(ADAPTIVE_TOURNAMENT_MAX, tournament_size + 1))
+    return mutation_rate, tournament_size
+
+def budget_pop_size(pop_size, evaluations_left, generations_left, fresh_share):
+    """
+    Population size, between pop_size and ADAPTIVE_POP_GROWTH times it, that spends the
+    remaining evaluation budget evenly over the remaining generations, given the share
+    of a generation that needed a fresh fitness evaluation.
+    """
+    affordable = evaluations_left / max(1, generations_left) / max(fresh_share, 0.1)
+    return int(min(max(round(affordable), pop_size), int(pop_size * ADAPTIVE_POP_GROWTH)))
+
 def genetic_algorithm(dept_list_names, grid_values_map, relation_dict_weights, 
-                      initial_sequence, pop_size=30, generations=100, mutation_rate=0.2, elitism_count=2):
+                      initial_sequence, pop_size=30, generations=100, mutation_rate=0.2, elitism_count=2,
+                      relation_csr=None, constraints=None, seed_sequences=None, stats=None,
+                      checkpoint_id=None, resume_state=None, adaptive=False, evaluation_budget=None,
+                      trajectory=None, hall_of_fame=None):
     """
-    Runs GA for a fixed number of generations.
+    Runs GA for a fixed number of generations, or until evaluation_budget fitness
+    evaluations (calculate_fitness calls) have been spent; the generation that spends
+    the last of it keeps only the members scored within the budget.
+    Sequences seen before (elites, repeated children) are scored from a per-run cache,
+    keyed by sequence_key so sequences differing only in interchangeable departments
+    share an entry; placed layouts whose canonical_layout_key (e.g. a mirror image) was
+    already scored reuse that fitness. Children equivalent to a member of the next
+    generation are re-mutated (up to DIVERSITY_RETRIES times) to keep the population diverse.
+    If stats (dict) is given it receives generations, evaluations, cache_hits (including
+    layout_hits, the mirror/canonical layout matches) and cache_lookups.
+    seed_sequences are added to the initial population (see initialize_population).
+    If relation_csr (from build_relationship_csr) is given, fitness only visits
+    the nonzero relationship pairs.
+    If constraints (from normalize_constraints) are given, layouts are placed with
+    place_departments_constrained and infeasible ones score the usual penalty.
+    If checkpoint_id is given, the evaluated population, RNG state and best layout are
+    saved every CHECKPOINT_EVERY generations and after the last one (see checkpoint.py).
+    resume_state (from load_checkpoint_state) continues such a run at its saved
+    generation instead of starting a new population, with the evaluations, fitness caches
+    and trajectory it had; generations is the total count.
+    With adaptive=True, mutation rate and tournament size follow the population's diversity
+    and progress each generation (see adapt_parameters), and with an evaluation_budget the
+    population is resized to spend it over the remaining generations (see budget_pop_size).
+    If trajectory (list) is given it receives the parameters used in each adaptive generation.
+    If hall_of_fame (HallOfFame) is given, every freshly evaluated feasible layout is
+    offered to it, keyed by canonical_layout_key so equivalent layouts count once.
     """
-    population = initialize_population(dept_list_names, initial_sequence, pop_size)
-    
-    best_layout_overall = None
-    best_positions_overall = None
-    best_score_overall = -np.inf
-    history_of_best_scores = []
+    symmetry = build_layout_symmetry(dept_list_names, grid_values_map, relation_dict_weights, constraints)
+    start_gen = 0
+    resumed_fitnesses = None
+    base_mutation_rate = mutation_rate
+    base_pop_size = pop_size
+    tournament_size = 4
+    stagnant_for = 0
+    fitness_cache = {}  # sequence_key -> (fitness, positions, sequence)
+    layout_fitness = {}  # canonical_layout_key -> (fitness, sequence)
+    evaluations = 0
+    fresh_share = 1.0  # share of the last generation that needed a fresh evaluation
+    if resume_state is not None:
+        # The saved generation was already evaluated, so the loop starts by breeding from it
+        start_gen = resume_state['generation']
+        population = [list(sequence) for sequence in resume_state['population']]
+        resumed_fitnesses = list(resume_state['fitnesses'])
+        history_of_best_scores = list(resume_state['history'])
+        best_layout_overall = resume_state['best_sequence']
+        best_score_overall = resume_state['best_score']
+        best_positions_overall = None
+        if best_layout_overall:
+            _, best_positions_overall = place_layout(best_layout_overall, grid_values_map, constraints)
+        random.setstate(resume_state['rng_state'])
+        if hall_of_fame is not None:
+            for entry in resume_state.get('hall_of_fame') or []:
+                grid, positions = place_layout(entry['sequence'], grid_values_map, constraints)
+                hall_of_fame.offer(entry['score'], canonical_layout_key(grid, symmetry), entry['sequence'], positions)
+        parameters = resume_state.get('parameters') or {}
+        mutation_rate = parameters.get('mutation_rate', mutation_rate)
+        tournament_size = parameters.get('tournament_size', tournament_size)
+        stagnant_for = parameters.get('stagnant_for', stagnant_for)
+        evaluations = parameters.get('evaluations', evaluations)
+        fresh_share = parameters.get('fresh_share', fresh_share)
+        if trajectory is not None:
+            trajectory.extend(resume_state.get('trajectory') or [])
+        # Refill both caches, so sequences scored before the checkpoint are not evaluated
+        # (and charged to the budget) again
+        for sequence, fitness in resume_state.get('fitness_cache') or []:
+            _, positions = place_layout(sequence, grid_values_map, constraints)
+            fitness_cache[sequence_key(sequence, symmetry)] = (fitness, positions, sequence)
+        for sequence, fitness in resume_state.get('layout_cache') or []:
+            grid, _ = place_layout(sequence, grid_values_map, constraints)
+            layout_fitness[canonical_layout_key(grid, symmetry)] = (fitness, sequence)
+        logger.info("Resuming GA at generation %d of %d", start_gen, generations)
+    else:
+        population = initialize_population(dept_list_names, initial_sequence, pop_size, seed_sequences)
 
-    for gen in range(generations):
+        best_layout_overall = None
+        best_positions_overall = None
+        best_score_overall = -np.inf
+        history_of_best_scores = []
+    cache_hits = 0
+    layout_hits = 0
+
+    for gen in range(start_gen, generations):
         current_gen_fitnesses = []
         current_gen_positions = []
 
-        for individual_sequence in population:
-            grid, positions = place_departments(individual_sequence, grid_values_map)
-            fitness = calculate_fitness(positions, relation_dict_weights)
+        if resumed_fitnesses is not None:
+            current_gen_fitnesses, resumed_fitnesses = resumed_fitnesses, None
+            population_to_score = []
+        else:
+            population_to_score = population
+
+        previous_best = best_score_overall
+        evaluations_before = evaluations
+        for individual_sequence in population_to_score:
+            key = sequence_key(individual_sequence, symmetry)
+            cached = fitness_cache.get(key)
+            if cached is not None:
+                fitness, positions, cached_sequence = cached
+                cache_hits += 1
+            else:
+                grid, positions = place_layout(individual_sequence, grid_values_map, constraints)
+                cached_sequence = individual_sequence
+                layout_key = canonical_layout_key(grid, symmetry)
+                cached_layout = layout_fitness.get(layout_key) if layout_key is not None else None
+                if cached_layout is not None:
+                    fitness = cached_layout[0]
+                    cache_hits += 1
+                    layout_hits += 1
+                else:
+                    if evaluation_budget is not None and evaluations >= evaluation_budget:
+                        break  # Budget spent: the rest of this generation is dropped unscored
+                    if relation_csr is not None:
+                        fitness = calculate_fitness_sparse(positions, relation_csr)
+                    else:
+                        fitness = calculate_fitness(positions, relation_dict_weights)
+                    evaluations += 1
+                    if hall_of_fame is not None:
+                        hall_of_fame.offer(fitness, layout_key, individual_sequence, positions)
+                    if layout_key is not None:
+                        if len(layout_fitness) >= FITNESS_CACHE_SIZE:
+                            layout_fitness.clear()
+                        layout_fitness[layout_key] = (fitness, list(individual_sequence))
+                if len(fitness_cache) >= FITNESS_CACHE_SIZE:
+                    fitness_cache.clear()
+                fitness_cache[key] = (fitness, positions, list(individual_sequence))
             current_gen_fitnesses.append(fitness)
             current_gen_positions.append(positions) # Store positions for the best
             
-            if fitness > best_score_overall:
+            # Infeasible layouts score the penalty but are never reported as best
+            if positions is not None and fitness > best_score_overall:
+                if cached_sequence != individual_sequence:
+                    # Cached positions name the interchangeable departments of an equivalent sequence
+                    grid, positions = place_layout(individual_sequence, grid_values_map, constraints)
                 best_score_overall = fitness
                 best_layout_overall = individual_sequence.copy()
                 best_positions_overall = positions.copy() if positions else None
+        if len(current_gen_fitnesses) < len(population):
+            population = population[:len(current_gen_fitnesses)]
         
-        history_of_best_scores.append(best_score_overall if best_score_overall > -np.inf else np.nan) # Use NaN if no valid layout yet
+        last_gen = gen == generations - 1 or (evaluation_budget is not None and evaluations >= evaluation_budget)
+        if population_to_score:
+            history_of_best_scores.append(best_score_overall if best_score_overall > -np.inf else np.nan) # Use NaN if no valid layout yet
+
+            fresh_share = (evaluations - evaluations_before) / len(population)
+            if adaptive:
+                stagnant_for = 0 if best_score_overall > previous_best else stagnant_for + 1
+                diversity, fitness_std = population_diversity(population, current_gen_fitnesses, symmetry)
+                if trajectory is not None:
+                    trajectory.append({
+                        'generation': gen,
+                        'mutation_rate': round(mutation_rate, 4),
+                        'tournament_size': tournament_size,
+                        'pop_size': len(population),
+                        'diversity': round(diversity, 4),
+                        'fitness_std': round(fitness_std, 3),
+                        'evaluations': evaluations,
+                    })
+                mutation_rate, tournament_size = adapt_parameters(
+                    mutation_rate, tournament_size, base_mutation_rate, diversity, fitness_std, stagnant_for
+                )
+
+            if checkpoint_id and ((gen + 1) % CHECKPOINT_EVERY == 0 or last_gen):
+                save_checkpoint_state(checkpoint_id, dept_list_names, {
+                    'generation': gen,
+                    'population': population,
+                    'fitnesses': current_gen_fitnesses,
+                    'history': history_of_best_scores,
+                    'best_sequence': best_layout_overall,
+                    'best_score': best_score_overall,
+                    'rng_state': random.getstate(),
+                    'parameters': {'mutation_rate': mutation_rate, 'tournament_size': tournament_size,
+                                   'stagnant_for': stagnant_for, 'evaluations': evaluations,
+                                   'fresh_share': fresh_share},
+                    'trajectory': trajectory or [],
+                    'hall_of_fame': hall_of_fame.entries() if hall_of_fame is not None else [],
+                    'fitness_cache': [(sequence, fitness) for fitness, _, sequence in fitness_cache.values()],
+                    'layout_cache': [(sequence, fitness) for fitness, sequence in layout_fitness.values()],
+                })
+
+        if last_gen and gen < generations - 1:
+            logger.info("Evaluation budget of %d spent after generation %d", evaluation_budget, gen)
+            generations = gen + 1
+            break
+
+        # Resize the population to spend the rest of the budget over the remaining generations
+        # (here rather than at checkpoint time, so a run extended on resume sizes it alike)
+        if adaptive and evaluation_budget is not None:
+            pop_size = budget_pop_size(base_pop_size, evaluation_budget - evaluations,
+                                       generations - gen - 1, fresh_share)
 
         # Build next generation
         new_population = []
 
-        # Elitism: Keep the best individuals from the current generation
+        # Elitism: Keep the best individuals from the current generation,
+        # skipping copies of a layout that is already kept
         sorted_indices = np.argsort(current_gen_fitnesses)[::-1] # Sort descending
-        for i in range(min(elitism_count, pop_size)):
-            new_population.append(population[sorted_indices[i]].copy())
+        kept_keys = set()
+        for i in sorted_indices:
+            if len(new_population) >= min(elitism_count, pop_size):
+                break
+            key = sequence_key(population[i], symmetry)
+            if key not in kept_keys:
+                kept_keys.add(key)
+                new_population.append(population[i].copy())
 
         # Fill the rest with new individuals generated through crossover and mutation
         while len(new_population) < pop_size:
-            parent1, parent2 = select_parents(population, current_gen_fitnesses)
+            parent1, parent2 = select_parents(population, current_gen_fitnesses,
+                                              min(tournament_size, len(population)))
             child = crossover(parent1, parent2)
             child = mutate(child, mutation_rate)
+            for _ in range(DIVERSITY_RETRIES):
+                if sequence_key(child, symmetry) not in kept_keys:
+                    break
+                child = mutate(child, 1.0)
+            kept_keys.add(sequence_key(child, symmetry))
             new_population.append(child)
         
         population = new_population
         
         if gen % 10 == 0 or gen == generations - 1:
-            print(f"Generation {gen:3d} | Best Score so far = {best_score_overall:.2f}")
+            logger.debug("Generation %3d | Best Score so far = %.2f", gen, best_score_overall)
+
+    if stats is not None:
+        stats.update(generations=generations - start_gen, evaluations=evaluations,
+                     cache_hits=cache_hits, cache_lookups=evaluations + cache_hits,
+                     layout_hits=layout_hits)
 
     return best_layout_overall, best_positions_overall, best_score_overall, history_of_best_scores
 
@@ -305,7 +918,7 @@ def plot_layout(layout_positions, title="Facility Layout"):
     Plots the facility layout only (score history graph removed).
     """
     if layout_positions is None:
-        print("No valid layout to plot.")
+        logger.warning("No valid layout to plot.")
         return None # Return None if no layout to plot
 
     # Only create layout plot (removed score history graph)
@@ -367,45 +980,54 @@ def plot_layout(layout_positions, title="Facility Layout"):
     # plt.show() - Comment out for web integration
     return fig # Return the figure object
 
-# --- Main Orchestration Function ---
+def plot_layout_png(layout_positions, title="Facility Layout"):
+    """
+    Renders plot_layout to PNG bytes, or None if there is no layout.
+    """
+    with PLOT_RENDER_SECONDS.time():
+        fig = plot_layout(layout_positions, title=title)
+        if fig is None:
+            return None
 
-def run_facility_layout_optimization(department_areas_info, relationship_definitions, 
-                                     initial_user_sequence, 
-                                     pop_size=50, generations=100, 
-                                     mutation_rate=0.2, elitism=2):
+        buf = BytesIO()
+        fig.savefig(buf, format='png', dpi=100)
+        plt.close(fig)  # Close figure to free memory
+        return buf.getvalue()
+
+def plot_layout_base64(layout_positions, title="Facility Layout"):
     """
-    Main function to run the facility layout optimization.
+    Renders plot_layout to a PNG and returns it base64 encoded, or None if there is no layout.
+    """
+    png = plot_layout_png(layout_positions, title=title)
+    return base64.b64encode(png).decode('utf-8') if png is not None else None
 
-    Args:
-        department_areas_info (dict): Dept names as keys, areas as values.
-                                      Example: {"Office": 100, "Lab": 250, "Storage": 80}
-        relationship_definitions (list): List of tuples defining relationships.
-                                         Format: [("Dept1", "Dept2", "REL_CODE"), ...]
-                                         REL_CODE: A, E, I, O, U, X
-                                         Example: [("Office", "Lab", "A"), ("Lab", "Storage", "E")]
-        initial_user_sequence (list): A suggested initial order of departments for placement.
-                                      Example: ["Office", "Lab", "Storage"]
-                                      Can be empty or None if no specific initial sequence is provided.
-        pop_size (int): Population size for the genetic algorithm.
-        generations (int): Number of generations for the GA.
-        mutation_rate (float): Mutation probability.
-        elitism (int): Number of best individuals to carry to the next generation.
+# --- Main Orchestration Function ---
 
-    Returns:
-        tuple: (best_layout_sequence, best_layout_positions, best_score, score_history_list)
-               or (None, None, -np.inf, []) if no solution is found.
+def prepare_layout_problem(department_areas_info, relationship_definitions,
+                           initial_user_sequence, constraints=None, seed_sequences=None,
+                           department_index=None):
     """
-    print("=== SmartGrid PlannerX Layout Optimization Started ===")
+    Turns the raw optimization inputs (see run_facility_layout_optimization) into
+    the structures the search algorithms work on.
 
+    Returns:
+        dict: dept_list_names, grid_values_map, relation_dict_weights, relation_csr,
+              constraints (normalized or None), initial_sequence (validated or None)
+              and seed_sequences (repaired warm-start seeds plus the TCR sequence),
+              or None if the departments cannot be laid out at all.
+    department_index (from build_department_index) is reused when it matches the departments.
+    """
     # 1. Process Department Info
     dept_list_names = list(department_areas_info.keys())
     dept_areas = department_areas_info.copy()
     
     if not dept_list_names:
-        print("Error: No department information provided.")
-        return None, None, -np.inf, []
+        logger.error("No department information provided.")
+        return None
 
     n_departments = len(dept_list_names)
+    if department_index is None or list(department_index) != dept_list_names:
+        department_index = build_department_index(dept_list_names)
     total_area = sum(dept_areas.values())
     avg_area = total_area / n_departments if n_departments > 0 else 0
     
@@ -413,20 +1035,22 @@ def run_facility_layout_optimization(department_areas_info, relationship_definit
         d: (2 if dept_areas[d] > avg_area else 1)
         for d in dept_list_names
     }
-    print(f"Departments: {dept_list_names}")
-    print(f"Average area = {avg_area:.2f}. Grid values assigned: {grid_values_map}")
+    logger.debug("Departments: %s", dept_list_names)
+    logger.debug("Average area = %.2f. Grid values assigned: %s", avg_area, grid_values_map)
     
     # Check if total required cells exceed grid capacity
     total_cells_needed = sum(grid_values_map.values())
     if total_cells_needed > GRID_ROWS * GRID_COLS:
-        print(f"Error: Total cells needed ({total_cells_needed}) exceeds grid capacity ({GRID_ROWS * GRID_COLS}).")
-        print("Consider increasing grid size or reducing department areas/count.")
-        return None, None, -np.inf, []
+        logger.error("Total cells needed (%d) exceeds grid capacity (%d). "
+                     "Consider increasing grid size or reducing department areas/count.",
+                     total_cells_needed, GRID_ROWS * GRID_COLS)
+        return None
 
 
     # 2. Process Relationship Info
     relation_dict_weights = {}
-    rel_weights_map = {'A': 243, 'E': 81, 'I': 27, 'O': 9, 'U': 3, 'X': 0}
+    # X (undesirable) mirrors A so that adjacent X pairs are penalized
+    rel_weights_map = {'A': 243, 'E': 81, 'I': 27, 'O': 9, 'U': 3, 'X': -243}
     for rel_item in relationship_definitions:
         if len(rel_item) == 3:
             fr_dept, to_dept, rel_code = rel_item
@@ -434,48 +1058,183 @@ def run_facility_layout_optimization(department_areas_info, relationship_definit
             w = rel_weights_map.get(rel_code, 0)
             
             # Ensure departments exist
-            if fr_dept not in dept_list_names or to_dept not in dept_list_names:
-                print(f"Warning: Unknown department in relationship: {fr_dept} or {to_dept}. Skipping {rel_item}.")
+            if fr_dept not in department_index or to_dept not in department_index:
+                logger.warning("Unknown department in relationship: %s or %s. Skipping %s.", fr_dept, to_dept, rel_item)
                 continue
 
             relation_dict_weights[(fr_dept, to_dept)] = w
             relation_dict_weights[(to_dept, fr_dept)] = w # Ensure symmetry
         else:
-            print(f"Warning: Malformed relationship item: {rel_item}. Expected (Dept1, Dept2, REL_CODE).")
+            logger.warning("Malformed relationship item: %s. Expected (Dept1, Dept2, REL_CODE).", rel_item)
+
+    logger.debug("Processed relationship weights: %s", relation_dict_weights)
+
+    # Sparse neighbor lists, built once and shared by every fitness evaluation
+    relation_csr = build_relationship_csr(dept_list_names, relation_dict_weights, department_index)
 
-    print(f"Processed relationship weights: {relation_dict_weights}")
+    constraints = normalize_constraints(constraints, dept_list_names, grid_values_map)
+    if constraints:
+        logger.info("Hard constraints: %d fixed, %d not-adjacent pairs, %d on perimeter",
+                    len(constraints['fixed_cells']),
+                    sum(len(v) for v in constraints['not_adjacent'].values()) // 2,
+                    len(constraints['perimeter']))
 
     # 3. Validate Initial Sequence (optional, GA can start without it)
     if initial_user_sequence:
         if not (set(initial_user_sequence) == set(dept_list_names) and \
                 len(initial_user_sequence) == n_departments):
-            print("Warning: Provided initial sequence is invalid (doesn't match departments or has duplicates). Will generate a random one.")
+            logger.warning("Provided initial sequence is invalid (doesn't match departments or has duplicates). Will generate a random one.")
             initial_user_sequence = None # Let GA generate initial population randomly
     else:
-         print("No initial user sequence provided. GA will start with random sequences.")
-
-
-    # 4. Run Genetic Algorithm
-    print(f"\nRunning Genetic Algorithm (Pop: {pop_size}, Gen: {generations}, MutRate: {mutation_rate}, Elitism: {elitism})...")
-    best_layout, best_positions, best_score, score_history = genetic_algorithm(
-        dept_list_names=dept_list_names,
-        grid_values_map=grid_values_map,
-        relation_dict_weights=relation_dict_weights,
-        initial_sequence=initial_user_sequence,
-        pop_size=pop_size,
-        generations=generations,
-        mutation_rate=mutation_rate,
-        elitism_count=elitism
-    )
+         logger.debug("No initial user sequence provided. GA will start with random sequences.")
+
+    # 4. Repair warm-start seeds for added/removed departments
+    seed_sequences = [repair_sequence(seed, dept_list_names) for seed in seed_sequences or []]
+    if seed_sequences:
+        logger.info("Warm start: %d seed sequence(s)", len(seed_sequences))
+
+    # The TCR (Total Closeness Rating) sequence gives the GA a strong non-random starting point
+    tcr_sequence = tcr_analysis(department_areas_info, relationship_definitions, index=department_index)['sequence']
+    seed_sequences.append(tcr_sequence)
+    logger.debug("TCR seed sequence: %s", tcr_sequence)
+
+    return {
+        'dept_list_names': dept_list_names,
+        'grid_values_map': grid_values_map,
+        'relation_dict_weights': relation_dict_weights,
+        'relation_csr': relation_csr,
+        'constraints': constraints,
+        'initial_sequence': initial_user_sequence,
+        'seed_sequences': seed_sequences,
+    }
+
+
+def run_facility_layout_optimization(department_areas_info, relationship_definitions, 
+                                     initial_user_sequence, 
+                                     pop_size=50, generations=100, 
+                                     mutation_rate=0.2, elitism=2, constraints=None,
+                                     seed_sequences=None, department_index=None, report=None,
+                                     profile=False, checkpoint_id=None, resume_state=None,
+                                     adaptive=False, evaluation_budget=None, top_k=0):
+    """
+    Main function to run the facility layout optimization.
+
+    Args:
+        department_areas_info (dict): Dept names as keys, areas as values.
+                                      Example: {"Office": 100, "Lab": 250, "Storage": 80}
+        relationship_definitions (list): List of tuples defining relationships.
+                                         Format: [("Dept1", "Dept2", "REL_CODE"), ...]
+                                         REL_CODE: A, E, I, O, U, X
+                                         Example: [("Office", "Lab", "A"), ("Lab", "Storage", "E")]
+        initial_user_sequence (list): A suggested initial order of departments for placement.
+                                      Example: ["Office", "Lab", "Storage"]
+                                      Can be empty or None if no specific initial sequence is provided.
+        pop_size (int): Population size for the genetic algorithm.
+        generations (int): Number of generations for the GA.
+        mutation_rate (float): Mutation probability.
+        elitism (int): Number of best individuals to carry to the next generation.
+        constraints (dict): Optional hard constraints.
+                            Format: {"fixed_cells": {"Dept": [(row, col), ...]},
+                                     "not_adjacent": [("Dept1", "Dept2"), ...],
+                                     "perimeter": ["Dept", ...]}
+                            Layouts that violate them are rejected during placement.
+        seed_sequences (list): Optional sequences to warm-start the population with,
+                               e.g. earlier best sequences for a similar department set.
+                               Added/removed departments are repaired automatically.
+        department_index (dict): Optional shared {dept_name: row} from build_department_index.
+        report (dict): Optional dict that receives run details:
+                       timings: {"parse": ms, "ga": ms}
+                       stats: GA counters (see genetic_algorithm)
+                       infeasible: True if no layout satisfied the constraints
+                       profile: top functions and pstats dump id (only with profile=True)
+        profile (bool): Run under cProfile and put the hot-path breakdown in report['profile'].
+        checkpoint_id (str): Optional job id to checkpoint the GA under (see checkpoint.py).
+        resume_state (dict): Optional load_checkpoint_state result to continue from;
+                             generations is then the new total, counting the resumed ones.
+        adaptive (bool): Adapt mutation rate, tournament size and (with evaluation_budget)
+                         population size to the run's diversity and progress; the values
+                         used per generation go to report['parameter_trajectory'].
+        evaluation_budget (int): Optional cap on fitness evaluations; the GA stops once spent.
+        top_k (int): Keep the top_k best distinct layouts of the run (see HallOfFame) in
+                     report['top_layouts'] as [{"sequence", "positions", "score"}, ...].
+
+    Returns:
+        tuple: (best_layout_sequence, best_layout_positions, best_score, score_history_list)
+               or (None, None, -np.inf, []) if no solution is found.
+    """
+    if profile:
+        profiler = RunProfiler().start()
+        try:
+            return run_facility_layout_optimization(
+                department_areas_info, relationship_definitions, initial_user_sequence,
+                pop_size=pop_size, generations=generations, mutation_rate=mutation_rate,
+                elitism=elitism, constraints=constraints, seed_sequences=seed_sequences,
+                department_index=department_index, report=report,
+                checkpoint_id=checkpoint_id, resume_state=resume_state,
+                adaptive=adaptive, evaluation_budget=evaluation_budget, top_k=top_k
+            )
+        finally:
+            profile_report = profiler.report()
+            if report is not None:
+                report['profile'] = profile_report
+
+    logger.info("SmartGrid PlannerX layout optimization started")
+
+    timer = PhaseTimer()
+    stats = {}
+    trajectory = [] if adaptive else None
+    hall_of_fame = HallOfFame(top_k) if top_k > 0 else None
+    if report is not None:
+        report['timings'] = timer.timings
+        report['stats'] = stats
+        if adaptive:
+            report['parameter_trajectory'] = trajectory
+
+    with timer.phase('parse'):
+        problem = prepare_layout_problem(department_areas_info, relationship_definitions,
+                                         initial_user_sequence, constraints, seed_sequences,
+                                         department_index)
+    if problem is None:
+        return None, None, -np.inf, []
+
+    # 5. Run Genetic Algorithm
+    logger.info("Running Genetic Algorithm (Pop: %s, Gen: %s, MutRate: %s, Elitism: %s)",
+                pop_size, generations, mutation_rate, elitism)
+    with timer.phase('ga'):
+        best_layout, best_positions, best_score, score_history = genetic_algorithm(
+            dept_list_names=problem['dept_list_names'],
+            grid_values_map=problem['grid_values_map'],
+            relation_dict_weights=problem['relation_dict_weights'],
+            initial_sequence=problem['initial_sequence'],
+            pop_size=pop_size,
+            generations=generations,
+            mutation_rate=mutation_rate,
+            elitism_count=elitism,
+            relation_csr=problem['relation_csr'],
+            constraints=problem['constraints'],
+            seed_sequences=problem['seed_sequences'],
+            stats=stats,
+            checkpoint_id=checkpoint_id,
+            resume_state=resume_state,
+            adaptive=adaptive,
+            evaluation_budget=evaluation_budget,
+            trajectory=trajectory,
+            hall_of_fame=hall_of_fame
+        )
+    if hall_of_fame is not None and report is not None:
+        report['top_layouts'] = hall_of_fame.entries()
 
-    print("\n=== Genetic Algorithm Finished ===")
     if best_layout:
-        print("Optimal Sequence (permutation):", best_layout)
-        print("Optimal Adjacency Score:", best_score)
-        # print("Positions:", best_positions) # Can be verbose
+        logger.info("Genetic Algorithm finished. Optimal Adjacency Score: %s", best_score,
+                    extra={'fields': timer.timings})
+        logger.debug("Optimal Sequence (permutation): %s", best_layout)
+    elif problem['constraints'] is not None:
+        logger.warning("No layout satisfies the hard constraints.")
+        if report is not None:
+            report['infeasible'] = True
     else:
-        print("No valid layout could be found.")
-        print("Consider increasing generations, population size, or grid dimensions if departments don't fit.")
+        logger.warning("No valid layout could be found. Consider increasing generations, "
+                       "population size, or grid dimensions if departments don't fit.")
 
     # Comment out the plotting code as we'll handle it separately for the web interface
     # if best_positions:
@@ -500,14 +1259,14 @@ if __name__ == "__main__":
     }
 
     # (Dept1, Dept2, Relationship_Code)
-    # A=Absolutely Necessary, E=Especially Important, I=Important, O=Ordinary, U=Unimportant, X=Undesirable (0 weight)
+    # A=Absolutely Necessary, E=Especially Important, I=Important, O=Ordinary, U=Unimportant, X=Undesirable (negative weight)
     relationship_data = [
         ("Reception", "Office A", "A"),
         ("Reception", "Meeting Room", "E"),
         ("Office A", "Office B", "I"),
         ("Office A", "Lab", "U"), # Example of U, will have low impact
         ("Lab", "Storage", "A"),
-        ("Meeting Room", "Lab", "X"), # Example of X, will have 0 weight for adjacency
+        ("Meeting Room", "Lab", "X"), # Example of X, adjacency is penalized
         ("Office B", "Meeting Room", "O"),
         ("Break Room", "Office A", "I"),
         ("Break Room", "Office B", "I"),
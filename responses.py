@@ -0,0 +1,135 @@
+import os
+import gzip
+
+from flask.json.provider import DefaultJSONProvider
+
+from tcr import compact_relationships
+from telemetry import get_logger
+
+# Faster codecs: orjson for JSON, brotli for compression (both in requirements.txt;
+# the json module and gzip stay in use where they are not installed)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = get_logger(__name__)
+
+# Bodies smaller than this are sent as-is; compressing them costs more than it saves
+COMPRESS_MIN_BYTES = int(os.getenv('COMPRESS_MIN_BYTES', 1024))
+GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', 6))
+# Brotli quality 0-11; 4 compresses better than gzip -6 at a similar speed
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', 4))
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/x-ndjson', 'text/plain', 'text/csv', 'text/html')
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson. Output matches DefaultJSONProvider's
+    (sorted keys, HTTP dates); values orjson cannot encode fall back to the json module.
+    """
+
+    if orjson is not None:
+        OPTIONS = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+                   | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS)
+
+    def dumps(self, obj, **kwargs):
+        option = self.OPTIONS | (orjson.OPT_INDENT_2 if kwargs.get('indent') else 0)
+        try:
+            return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+        except TypeError:
+            # e.g. integers wider than 64 bits
+            return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+def install_json_provider(app):
+    """Use orjson for app's JSON when it is installed"""
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
+        logger.info("Using orjson JSON provider")
+
+def plot_url(result_id):
+    """URL of the binary PNG plot of a stored optimization result"""
+    return f'/api/optimization-results/{result_id}/plot.png'
+
+def layout_plot_url(result_id, rank):
+    """URL of the PNG of a stored result's rank-th top layout (1 = best), rendered on demand"""
+    return f'/api/optimization-results/{result_id}/layouts/{rank}/plot.png'
+
+def history_options(args):
+    """
+    (compact, include_images) from the query string of a history endpoint:
+    ?relationships=matrix returns compact relationship matrices,
+    ?images=false leaves out base64 plots in favour of plotUrl.
+    """
+    return (args.get('relationships') == 'matrix',
+            (args.get('images') or 'true').lower() != 'false')
+
+def shape_history(documents, compact=False, include_images=True):
+    """Apply history_options to stored documents in place"""
+    for document in documents:
+        if compact and isinstance(document.get('relationship_data'), list):
+            document['relationship_data'] = compact_relationships(
+                document['relationship_data'], list((document.get('department_data') or {}).keys())
+            )
+        if not include_images and 'result_data' in document:
+            document['plotUrl'] = plot_url(document['_id'])
+    return documents
+
+def choose_encoding(accept_encoding):
+    """
+    Best supported content coding in an Accept-Encoding header ('br', 'gzip' or None).
+    Codings with q=0 are refused; brotli wins over gzip when both are acceptable.
+    """
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding.strip().lower()] = quality
+
+    wildcard = accepted.get('*', 0.0)
+    for coding in (('br', 'gzip') if brotli is not None else ('gzip',)):
+        if accepted.get(coding, wildcard) > 0:
+            return coding
+    return None
+
+def compress_body(body, encoding):
+    """Compress bytes with 'br' or 'gzip'"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+def compress_response(response, accept_encoding):
+    """
+    Compress a buffered Flask response in place when the client accepts it and the
+    body is large and compressible. Streamed bodies and files are left alone.
+    """
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code in (204, 304)
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(accept_encoding)
+    body = response.get_data()
+    if encoding is None or len(body) < COMPRESS_MIN_BYTES:
+        return response
+
+    response.set_data(compress_body(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
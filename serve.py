@@ -0,0 +1,42 @@
+import os
+import argparse
+
+import uvicorn
+from dotenv import load_dotenv
+
+from telemetry import configure_logging
+
+# Load environment variables
+load_dotenv()
+
+# Production launcher: `python serve.py`.
+# server.py's `python server.py` stays the single-process development server.
+#
+# It runs one server process: background job status, per-user admission limits and the
+# "already running" guard of checkpoint resumes live in its memory, so with several
+# processes a poll could land on one that never saw the job, limits would multiply and
+# two processes could resume the same checkpoint. Requests are served concurrently on
+# threads, and the worker count that matters, that of the GA process pool, is --batch-workers.
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the SmartGrid PlannerX API with uvicorn')
+    parser.add_argument('--host', default=os.getenv('HOST', '127.0.0.1'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('PORT', 5000)))
+    parser.add_argument('--batch-workers', type=int, default=None,
+                        help='Processes running optimizations (default BATCH_WORKERS, else one per CPU)')
+    args = parser.parse_args()
+    if args.batch_workers is not None:
+        if args.batch_workers < 1:
+            parser.error('--batch-workers must be at least 1')
+        # Read by batch.py when the app is imported below
+        os.environ['BATCH_WORKERS'] = str(args.batch_workers)
+
+    # GA runs go to the worker pool so they never stall the I/O endpoints of the server
+    os.environ.setdefault('OPTIMIZE_EXECUTOR', 'process')
+
+    configure_logging()
+    uvicorn.run('asgi_server:application', host=args.host, port=args.port,
+                lifespan='on', log_config=None)
+
+if __name__ == '__main__':
+    main()
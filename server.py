@@ -1,17 +1,61 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context, send_file
+import base64
+import binascii
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager, jwt_required, create_access_token, get_jwt_identity
 import json
-import base64
-from io import BytesIO
 import matplotlib
 matplotlib.use('Agg')
-import matplotlib.pyplot as plt
 import os
+import time
+import uuid
 from datetime import timedelta
 from dotenv import load_dotenv
 
-from python_script import run_facility_layout_optimization, plot_layout
+from python_script import run_facility_layout_optimization, plot_layout_base64, plot_layout_png
+from pareto import run_pareto_optimization
+from batch import run_batch, run_in_pool, MAX_BATCH_SCENARIOS
+from tcr import tcr_analysis
+from responses import (
+    install_json_provider,
+    compress_response,
+    history_options,
+    shape_history,
+    plot_url,
+    layout_plot_url
+)
+from bulk import (
+    BULK_KINDS,
+    BULK_FORMATS,
+    request_format,
+    iter_text_lines,
+    read_records,
+    render_ndjson,
+    render_csv
+)
+from checkpoint import (
+    save_checkpoint_job,
+    load_checkpoint_job,
+    load_checkpoint_state,
+    delete_checkpoint,
+    running_checkpoints
+)
+from admission import (
+    AdmissionError,
+    HEAVY_JOB_COST,
+    admission_controller,
+    background_jobs
+)
+from telemetry import (
+    get_logger,
+    PhaseTimer,
+    RunProfiler,
+    profile_dump_path,
+    REGISTRY,
+    OPTIMIZE_LATENCY,
+    OPTIMIZATIONS_IN_FLIGHT,
+    record_run_metrics
+)
 from database import (
     user_model,
     department_area_model,
@@ -22,6 +66,8 @@ from database import (
 # Load environment variables
 load_dotenv()
 
+logger = get_logger(__name__)
+
 app = Flask(__name__)
 CORS(app)
 
@@ -30,6 +76,57 @@ app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'your-super-secret-jw
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=int(os.getenv('JWT_ACCESS_TOKEN_EXPIRES', 24)))
 jwt = JWTManager(app)
 
+# orjson-backed jsonify when orjson is installed
+install_json_provider(app)
+
+@app.after_request
+def compress(response):
+    # gzip/brotli for large JSON and text bodies the client accepts
+    return compress_response(response, request.headers.get('Accept-Encoding'))
+
+# "process" runs /optimize's GA in the worker pool (serve.py's default), "inline" on the request thread
+OPTIMIZE_EXECUTOR = os.getenv('OPTIMIZE_EXECUTOR', 'inline').lower()
+# Most alternative layouts one /optimize run may return (topK)
+MAX_TOP_K = int(os.getenv('MAX_TOP_K', 10))
+
+class UnsatisfiableConstraints(Exception):
+    """No layout of a run satisfied its hard constraints"""
+
+def _is_cell(value):
+    return (isinstance(value, (list, tuple)) and len(value) == 2
+            and all(isinstance(v, int) and not isinstance(v, bool) for v in value))
+
+def parse_constraints(data):
+    """
+    Map the optional camelCase constraints payload to run_facility_layout_optimization's format.
+    Raises ValueError, with a message for the client, if the payload is not shaped like
+    {"fixedCells": {dept: [[row, col], ...]}, "notAdjacent": [[dept, dept], ...], "perimeter": [dept, ...]}.
+    """
+    constraints_data = data.get('constraints') or {}
+    if not isinstance(constraints_data, dict):
+        raise ValueError('constraints must be an object')
+    fixed_cells = constraints_data.get('fixedCells') or {}
+    not_adjacent = constraints_data.get('notAdjacent') or []
+    perimeter = constraints_data.get('perimeter') or []
+
+    if not isinstance(fixed_cells, dict):
+        raise ValueError('constraints.fixedCells must map department names to lists of [row, col] cells')
+    for dept, cells in fixed_cells.items():
+        if not isinstance(cells, (list, tuple)) or not all(_is_cell(cell) for cell in cells):
+            raise ValueError(f"constraints.fixedCells['{dept}'] must be a list of [row, col] cells")
+    if not isinstance(not_adjacent, (list, tuple)) or not all(
+            isinstance(pair, (list, tuple)) and len(pair) == 2 and all(isinstance(d, str) for d in pair)
+            for pair in not_adjacent):
+        raise ValueError('constraints.notAdjacent must be a list of [department, department] pairs')
+    if not isinstance(perimeter, (list, tuple)) or not all(isinstance(d, str) for d in perimeter):
+        raise ValueError('constraints.perimeter must be a list of department names')
+
+    return {
+        'fixed_cells': fixed_cells,
+        'not_adjacent': not_adjacent,
+        'perimeter': perimeter
+    }
+
 # Authentication Routes
 @app.route('/api/register', methods=['POST'])
 def register():
@@ -157,96 +254,649 @@ def save_relationship_matrix():
 def get_relationship_matrices():
     try:
         user_id = get_jwt_identity()
+        compact, _ = history_options(request.args)
         result = relationship_matrix_model.get_user_relationship_matrices(user_id)
+        if result['success']:
+            shape_history(result['relationship_matrices'], compact=compact)
         return jsonify(result)
 
     except Exception as e:
         return jsonify({'success': False, 'message': f'Error fetching relationship matrices: {str(e)}'}), 500
 
+# /optimize payload fields kept with a checkpoint, enough to resume the run by job id
+CHECKPOINT_REQUEST_FIELDS = ('departments', 'relationships', 'sequence', 'constraints', 'popSize',
+                             'generations', 'mutationRate', 'elitism', 'inlineImage',
+                             'adaptive', 'evaluationBudget', 'topK', 'topKImages')
+
+def validate_run_options(data):
+    """Raises ValueError, with a message for the client, if an optional /optimize field is malformed"""
+    parse_constraints(data)
+    if data.get('evaluationBudget') is not None:
+        try:
+            budget = int(data['evaluationBudget'])
+        except (TypeError, ValueError):
+            raise ValueError('evaluationBudget must be an integer')
+        if budget < 1:
+            raise ValueError('evaluationBudget must be at least 1')
+    if data.get('topK') is not None:
+        try:
+            top_k = int(data['topK'])
+        except (TypeError, ValueError):
+            raise ValueError('topK must be an integer')
+        if top_k < 0:
+            raise ValueError('topK must not be negative')
+        if top_k and data.get('mode', 'single') == 'pareto':
+            raise ValueError('topK is not supported in pareto mode; the Pareto front lists the alternatives')
+    if data.get('warmStartK') is not None:
+        try:
+            warm_start_k = int(data['warmStartK'])
+        except (TypeError, ValueError):
+            raise ValueError('warmStartK must be an integer')
+        if warm_start_k < 1:
+            raise ValueError('warmStartK must be at least 1')
+        # More seeds than the population holds would never be used (popSize itself is checked on admission)
+        try:
+            pop_size = int(data.get('popSize', 50))
+        except (TypeError, ValueError):
+            pop_size = None
+        if pop_size is not None and warm_start_k > pop_size:
+            raise ValueError(f'warmStartK must be at most popSize ({pop_size})')
+
+def resume_request(user_id, data):
+    """
+    (payload, resume_state) to continue the checkpointed run data['resumeJobId'] for
+    data['additionalGenerations'] more generations (0 finishes an interrupted run).
+    Raises LookupError if there is no such checkpoint, ValueError if there is nothing to run.
+    """
+    job = load_checkpoint_job(data['resumeJobId'], user_id)
+    resume_state = load_checkpoint_state(data['resumeJobId']) if job else None
+    if resume_state is None:
+        raise LookupError('Checkpoint not found')
+
+    payload = dict(job['request'])
+    payload['generations'] = int(payload.get('generations', 100)) + int(data.get('additionalGenerations', 0))
+    if payload['generations'] <= resume_state['generation'] + 1:
+        raise ValueError('This run already finished; pass additionalGenerations to continue it')
+    budget = payload.get('evaluationBudget')
+    if budget is not None and resume_state['parameters'].get('evaluations', 0) >= int(budget):
+        raise ValueError('This run already spent its evaluationBudget')
+    return payload, resume_state
+
+def run_optimization_request(user_id, data, profile=False, request_start=None,
+                             job_id=None, resume_state=None):
+    """
+    Runs one /optimize payload end to end: warm start, optimization, rendering and DB save.
+    Returns the response dict. Used inline by /optimize and by background jobs.
+    Raises UnsatisfiableConstraints if no layout honours the request's constraints.
+    With job_id, single-mode runs are checkpointed under it; resume_state continues one.
+    """
+    request_start = request_start or time.perf_counter()
+    timer = PhaseTimer()
+
+    department_data = data.get('departments', {})
+    relationship_data = data.get('relationships', [])
+    user_initial_sequence = data.get('sequence', [])
+    
+    
+    pop_size = int(data.get('popSize', 50))
+    generations = int(data.get('generations', 100))
+    mutation_rate = data.get('mutationRate', 0.2)
+    elitism = data.get('elitism', 2)
+    mode = data.get('mode', 'single')  # 'single' or 'pareto'
+    warm_start = data.get('warmStart', False)
+    warm_start_k = min(int(data.get('warmStartK') or 5), pop_size)
+    # False returns plotUrl (binary PNG) instead of the base64 plotImage
+    inline_image = data.get('inlineImage', True)
+    # Adaptive mutation/selection/population control, optionally capped by fitness evaluations
+    adaptive = bool(data.get('adaptive', False))
+    evaluation_budget = data.get('evaluationBudget')
+    if evaluation_budget is not None:
+        # Never more evaluations than the pop_size x generations the run was admitted for,
+        # on top of those a resumed run already spent
+        spent, start = 0, 0
+        if resume_state is not None:
+            spent = resume_state['parameters'].get('evaluations', 0)
+            start = resume_state['generation'] + 1
+        evaluation_budget = max(1, min(int(evaluation_budget), spent + pop_size * (generations - start)))
+    # The K best distinct layouts of a single-mode run; topKImages renders each one inline,
+    # otherwise they link to a PNG rendered on request
+    top_k = max(0, min(int(data.get('topK') or 0), MAX_TOP_K))
+    top_k_images = data.get('topKImages', False)
+
+    # Optional hard constraints: fixed cells, must-not-touch pairs, perimeter pins
+    constraints = parse_constraints(data)
+    
+    logger.debug("Received request: %d departments, %d relationships", len(department_data), len(relationship_data))
+
+    if job_id and mode != 'pareto':
+        save_checkpoint_job(job_id, user_id, {field: data[field] for field in CHECKPOINT_REQUEST_FIELDS
+                                              if field in data})
+
+    # Seed the population with the user's best stored sequences for similar department sets
+    # (a resumed run already has its population)
+    seed_sequences = None
+    if warm_start and resume_state is None:
+        with timer.phase('warm_start'):
+            warm = optimization_result_model.get_warm_start_sequences(
+                user_id, list(department_data.keys()), k=warm_start_k
+            )
+        if warm['success']:
+            seed_sequences = warm['sequences']
+        else:
+            logger.warning("Could not load warm-start sequences: %s", warm['message'])
+    
+    
+    pareto_front = None
+    run_report = {}
+
+    def run(fn, **params):
+        # Profiled runs stay in this process, since cProfile only sees the current thread
+        if OPTIMIZE_EXECUTOR == 'process' and not profile:
+            result, pool_report = run_in_pool(fn, **params)
+            run_report.update(pool_report)
+            return result
+        return fn(**params, report=run_report)
+
+    # Opt-in cProfile of the optimization and rendering (not the DB save)
+    profiler = RunProfiler().start() if profile else None
+    try:
+        OPTIMIZATIONS_IN_FLIGHT.inc(endpoint='optimize')
+        try:
+            if mode == 'pareto':
+                front = run(
+                    run_pareto_optimization,
+                    department_areas_info=department_data,
+                    relationship_definitions=relationship_data,
+                    initial_user_sequence=user_initial_sequence,
+                    pop_size=pop_size,
+                    generations=generations,
+                    mutation_rate=mutation_rate,
+                    constraints=constraints,
+                    seed_sequences=seed_sequences
+                )
+                pareto_front = [{
+                    'sequence': entry['sequence'],
+                    'adjacencyScore': float(entry['adjacency_score']),
+                    'exposedPerimeter': float(entry['exposed_perimeter']),
+                    'flowDistance': float(entry['flow_distance'])
+                } for entry in front]
+                # The highest-adjacency member of the front is plotted and reported as best
+                best_seq = front[0]['sequence'] if front else None
+                best_pos = front[0]['positions'] if front else None
+                best_score = pareto_front[0]['adjacencyScore'] if front else -float('inf')
+            else:
+                best_seq, best_pos, best_score, history = run(
+                    run_facility_layout_optimization,
+                    department_areas_info=department_data,
+                    relationship_definitions=relationship_data,
+                    initial_user_sequence=user_initial_sequence,
+                    pop_size=pop_size,
+                    generations=generations,
+                    mutation_rate=mutation_rate,
+                    elitism=elitism,
+                    constraints=constraints,
+                    seed_sequences=seed_sequences,
+                    checkpoint_id=job_id,
+                    resume_state=resume_state,
+                    adaptive=adaptive,
+                    evaluation_budget=evaluation_budget,
+                    top_k=top_k
+                )
+        finally:
+            OPTIMIZATIONS_IN_FLIGHT.dec(endpoint='optimize')
+        record_run_metrics(mode, run_report)
+        timer.timings.update(run_report.get('timings', {}))
+        if run_report.get('infeasible'):
+            raise UnsatisfiableConstraints('The constraints cannot be satisfied: no layout places '
+                                           'every department while honouring them')
+        
+        
+        with timer.phase('render'):
+            if best_pos:
+                plot_title = f"Optimal Layout (Score: {best_score:.0f})"
+                img_base64 = plot_layout_base64(best_pos, title=plot_title)
+            else:
+                img_base64 = None
+            top_layouts = run_report.get('top_layouts')
+            top_images = None
+            if top_layouts and top_k_images:
+                top_images = [plot_layout_base64(layout['positions'],
+                                                 title=f"Layout {rank} (Score: {layout['score']:.0f})")
+                              for rank, layout in enumerate(top_layouts, 1)]
+    except Exception:
+        if profiler:
+            profiler.stop()
+        raise
+    profile_report = profiler.report(owner=user_id) if profiler else None
+    
+    # Save optimization result to database
+    result_data = {
+        'bestSequence': best_seq,
+        'bestScore': best_score if best_score > -float('inf') else 0,
+        'plotImage': img_base64,
+        'success': best_seq is not None
+    }
+    if pareto_front is not None:
+        result_data['paretoFront'] = pareto_front
+    if top_layouts is not None:
+        # Positions are kept so each alternative can be rendered later
+        result_data['topLayouts'] = top_layouts
+
+    # Save to database (optional - don't fail if this fails)
+    saved = {'success': False}
+    try:
+        with timer.phase('db_save'):
+            saved = optimization_result_model.save_optimization_result(
+                user_id, department_data, relationship_data, result_data
+            )
+    except Exception as save_error:
+        logger.warning("Could not save optimization result: %s", save_error)
+
+    # Return results
+    response = {
+        'success': best_seq is not None,
+        'bestSequence': best_seq,
+        'bestScore': best_score if best_score > -float('inf') else 0,
+        'plotImage': img_base64,
+        'message': 'Success' if best_seq else 'No valid layout found'
+    }
+    if pareto_front is not None:
+        response['paretoFront'] = pareto_front
+    if seed_sequences is not None:
+        response['warmStartSeeds'] = len(seed_sequences)
+    if job_id and mode != 'pareto':
+        response['jobId'] = job_id
+    if resume_state is not None:
+        response['resumedFromGeneration'] = resume_state['generation']
+    if top_layouts is not None:
+        response['topLayouts'] = []
+        for rank, layout in enumerate(top_layouts, 1):
+            entry = {'rank': rank, 'sequence': layout['sequence'], 'score': layout['score']}
+            if top_images is not None:
+                entry['plotImage'] = top_images[rank - 1]
+            elif saved.get('success'):
+                entry['plotUrl'] = layout_plot_url(saved['id'], rank)
+            response['topLayouts'].append(entry)
+    if 'parameter_trajectory' in run_report:
+        response['parameterTrajectory'] = [{
+            'generation': step['generation'],
+            'mutationRate': step['mutation_rate'],
+            'tournamentSize': step['tournament_size'],
+            'popSize': step['pop_size'],
+            'diversity': step['diversity'],
+            'fitnessStd': step['fitness_std'],
+            'evaluations': step['evaluations']
+        } for step in run_report['parameter_trajectory']]
+    if profile_report is not None:
+        response['profile'] = profile_report
+    # The plot can only be linked once it is stored
+    if not inline_image and img_base64 and saved.get('success'):
+        del response['plotImage']
+        response['plotUrl'] = plot_url(saved['id'])
+
+    # Per-phase wall-clock milliseconds: parse, ga, render, db_save (+ warm_start) and total
+    elapsed = time.perf_counter() - request_start
+    timer.timings['total'] = round(elapsed * 1000.0, 3)
+    OPTIMIZE_LATENCY.observe(elapsed, mode=mode)
+    response['timings'] = timer.timings
+    logger.info("Optimization request finished", extra={'fields': timer.timings})
+    # Only failed or interrupted runs keep their checkpoint for resuming
+    if job_id and mode != 'pareto':
+        delete_checkpoint(job_id)
+    return response
+
 @app.route('/optimize', methods=['POST'])
 @jwt_required()
 def optimize():
+    claimed = None  # checkpoint job id held by this request (until a background job takes it over)
     try:
-        data = request.get_json()
-        
-        
-        department_data = data.get('departments', {})
-        relationship_data = data.get('relationships', [])
-        user_initial_sequence = data.get('sequence', [])
-        
-        
-        pop_size = data.get('popSize', 50)
-        generations = data.get('generations', 100)
-        mutation_rate = data.get('mutationRate', 0.2)
-        elitism = data.get('elitism', 2)
-        
-        print(f"Received request: {len(department_data)} departments, {len(relationship_data)} relationships")
-        
-        
-        best_seq, best_pos, best_score, history = run_facility_layout_optimization(
-            department_areas_info=department_data,
-            relationship_definitions=relationship_data,
-            initial_user_sequence=user_initial_sequence,
-            pop_size=pop_size,
-            generations=generations,
-            mutation_rate=mutation_rate,
-            elitism=elitism
-        )
-        
-        
-        if best_pos:
-            plot_title = f"Optimal Layout (Score: {best_score:.0f})"
-            fig = plot_layout(best_pos, title=plot_title)
-            
-            
-            buf = BytesIO()
-            fig.savefig(buf, format='png', dpi=100)
-            plt.close(fig)  # Close figure to free memory
-            buf.seek(0)
-            
-            # Convert to base64
-            img_base64 = base64.b64encode(buf.getvalue()).decode('utf-8')
-        else:
-            img_base64 = None
-        
-        # Save optimization result to database
+        request_start = time.perf_counter()
         user_id = get_jwt_identity()
-        result_data = {
-            'bestSequence': best_seq,
-            'bestScore': best_score if best_score > -float('inf') else 0,
-            'plotImage': img_base64,
-            'success': best_seq is not None
-        }
-
-        # Save to database (optional - don't fail if this fails)
+        data = request.get_json()
+        profile = data.get('profile', False) or request.args.get('profile') == 'true'
+
+        # Checkpointed runs can be resumed by job id, optionally with more generations;
+        # a job runs (and writes its checkpoint) in one request at a time
+        job_id = data.get('resumeJobId')
+        resume_state = None
+        remaining_generations = data.get('generations', 100)
+        if job_id:
+            if not running_checkpoints.claim(job_id):
+                return jsonify({'success': False, 'message': 'This job is already queued or running'}), 409
+            claimed = job_id
+            try:
+                data, resume_state = resume_request(user_id, data)
+            except LookupError as e:
+                return jsonify({'success': False, 'message': str(e)}), 404
+            except ValueError as e:
+                return jsonify({'success': False, 'message': str(e)}), 400
+            remaining_generations = data['generations'] - resume_state['generation'] - 1
+
         try:
-            optimization_result_model.save_optimization_result(
-                user_id, department_data, relationship_data, result_data
+            validate_run_options(data)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+
+        try:
+            cost = admission_controller.check_parameters(
+                data.get('popSize', 50), remaining_generations, len(data.get('departments', {}))
             )
-        except Exception as save_error:
-            print(f"Warning: Could not save optimization result: {save_error}")
 
-        # Return results
-        return jsonify({
-            'success': best_seq is not None,
-            'bestSequence': best_seq,
-            'bestScore': best_score if best_score > -float('inf') else 0,
-            'plotImage': img_base64,
-            'message': 'Success' if best_seq else 'No valid layout found'
-        })
+            # Heavy single-mode runs are always checkpointed, others on request
+            heavy = cost >= HEAVY_JOB_COST
+            if not job_id and data.get('mode', 'single') == 'single' and (heavy or data.get('checkpoint')):
+                job_id = uuid.uuid4().hex
+                running_checkpoints.claim(job_id)
+                claimed = job_id
+
+            # Heavy jobs go to the bounded background pool; the client polls statusUrl
+            if heavy:
+                charge = admission_controller.admit(user_id, cost)
+
+                def on_done(checkpoint_id=claimed):
+                    admission_controller.release(user_id)
+                    if checkpoint_id:
+                        running_checkpoints.release(checkpoint_id)
+
+                try:
+                    job_id = background_jobs.submit(
+                        user_id, run_optimization_request, user_id, data, profile,
+                        job_id=job_id, resume_state=resume_state,
+                        on_done=on_done, run_as=job_id
+                    )
+                except AdmissionError:
+                    admission_controller.release(user_id, refund=charge)
+                    raise
+                claimed = None  # Released by on_done
+                return jsonify({
+                    'success': True,
+                    'jobId': job_id,
+                    'status': 'queued',
+                    'estimatedCost': cost,
+                    'statusUrl': f'/api/optimize/jobs/{job_id}'
+                }), 202
+
+            with admission_controller.slot(user_id, cost):
+                response = run_optimization_request(user_id, data, profile, request_start,
+                                                    job_id=job_id, resume_state=resume_state)
+        except AdmissionError as e:
+            return jsonify({'success': False, 'message': e.message}), e.status
+        except UnsatisfiableConstraints as e:
+            return jsonify({'success': False, 'message': str(e)}), 422
+
+        return jsonify(response)
     except Exception as e:
-        print(f"Error during optimization: {str(e)}")
+        logger.exception("Error during optimization")
         return jsonify({
             'success': False,
             'message': f'Error during optimization: {str(e)}'
         }), 500
+    finally:
+        if claimed:
+            running_checkpoints.release(claimed)
+
+@app.route('/api/optimize/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_optimization_job(job_id):
+    job = background_jobs.get(job_id, get_jwt_identity())
+    if job is None:
+        return jsonify({'success': False, 'message': 'Job not found'}), 404
+
+    response = {'success': job['status'] != 'failed', 'jobId': job_id, 'status': job['status']}
+    if job['status'] == 'done':
+        response['result'] = job['result']
+    elif job['status'] == 'failed':
+        response['message'] = f"Error during optimization: {job['error']}"
+    return jsonify(response)
+
+@app.route('/api/tcr', methods=['POST'])
+@jwt_required()
+def compute_tcr():
+    try:
+        data = request.get_json()
+        department_data = data.get('departments', {})
+        rel_matrix = data.get('matrix')  # n x n REL codes in department order
+        relationship_data = data.get('relationships', [])
+
+        if not department_data:
+            return jsonify({'success': False, 'message': 'Department data is required'}), 400
+
+        try:
+            result = tcr_analysis(department_data, relationship_data, rel_matrix)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+
+        return jsonify({
+            'success': True,
+            'tcrScores': result['tcr_scores'],
+            'order': result['order'],
+            'sequence': result['sequence']
+        })
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error computing TCR: {str(e)}'}), 500
+
+@app.route('/api/optimize/batch', methods=['POST'])
+@jwt_required()
+def optimize_batch():
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json()
+        scenarios = data.get('scenarios', [])
+
+        if not scenarios:
+            return jsonify({'success': False, 'message': 'At least one scenario is required'}), 400
+        if len(scenarios) > MAX_BATCH_SCENARIOS:
+            return jsonify({'success': False, 'message': f'At most {MAX_BATCH_SCENARIOS} scenarios per batch'}), 400
+
+        # Each scenario overrides the top-level fields it sets
+        scenario_inputs = []
+        scenario_params = []
+        scenario_renders = []
+        batch_cost = 0
+        for scenario in scenarios:
+            merged = {**data, **scenario}
+            department_data = merged.get('departments', {})
+            relationship_data = merged.get('relationships', [])
+            try:
+                batch_cost += admission_controller.check_parameters(
+                    merged.get('popSize', 50), merged.get('generations', 100), len(department_data)
+                )
+            except AdmissionError as e:
+                return jsonify({'success': False, 'message': f"Scenario {len(scenario_params)}: {e.message}"}), e.status
+            try:
+                constraints = parse_constraints(merged)
+            except ValueError as e:
+                return jsonify({'success': False, 'message': f"Scenario {len(scenario_params)}: {e}"}), 400
+            scenario_inputs.append((merged.get('name'), department_data, relationship_data))
+            scenario_renders.append(merged.get('render', False))
+            scenario_params.append({
+                'department_areas_info': department_data,
+                'relationship_definitions': relationship_data,
+                'initial_user_sequence': merged.get('sequence', []),
+                'pop_size': int(merged.get('popSize', 50)),
+                'generations': int(merged.get('generations', 100)),
+                'mutation_rate': merged.get('mutationRate', 0.2),
+                'elitism': merged.get('elitism', 2),
+                'constraints': constraints
+            })
+
+        logger.debug("Received batch request: %d scenarios", len(scenarios))
+
+        # The whole batch holds one of the user's concurrency slots and is charged to the quota
+        try:
+            admission_controller.admit(user_id, batch_cost)
+        except AdmissionError as e:
+            return jsonify({'success': False, 'message': e.message}), e.status
+
+        # The slot is released once every scenario has finished or been cancelled, even when
+        # the client disconnects mid-stream, so abandoned work still counts against the limit
+        release = lambda: admission_controller.release(user_id)
+        started = []
+
+        def generate():
+            entries = []
+            remaining = len(scenario_params)
+            OPTIMIZATIONS_IN_FLIGHT.inc(remaining, endpoint='batch')
+            started.append(True)
+            results = run_batch(scenario_params, scenario_renders, on_done=release)
+            try:
+                for i, result_data in results:
+                    remaining -= 1
+                    OPTIMIZATIONS_IN_FLIGHT.dec(endpoint='batch')
+                    record_run_metrics('batch', result_data)
+                    name, department_data, relationship_data = scenario_inputs[i]
+                    if 'bestSequence' in result_data:
+                        entries.append({
+                            'department_data': department_data,
+                            'relationship_data': relationship_data,
+                            'result_data': result_data
+                        })
+                    yield json.dumps({'index': i, 'name': name, **result_data}) + '\n'
+            finally:
+                # Cancels the scenarios a disconnected client abandoned before they started;
+                # none of the abandoned ones count as in flight any more
+                results.close()
+                OPTIMIZATIONS_IN_FLIGHT.dec(remaining, endpoint='batch')
+
+            # One round trip for the whole batch (optional - don't fail if this fails)
+            saved = optimization_result_model.save_optimization_results(user_id, entries)
+            if not saved['success']:
+                logger.warning("Could not save batch results: %s", saved['message'])
+            yield json.dumps({'done': True, 'saved': len(saved.get('ids', []))}) + '\n'
+
+        response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        # A stream closed before it started never submitted anything
+        response.call_on_close(lambda: None if started else release())
+        return response
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error during batch optimization: {str(e)}'}), 500
+
+def bulk_handlers(kind):
+    """(import method, export iterator) of the model behind a bulk kind"""
+    return {
+        'department-areas': (department_area_model.import_department_areas,
+                             department_area_model.iter_user_department_areas),
+        'relationship-matrices': (relationship_matrix_model.import_relationship_matrices,
+                                  relationship_matrix_model.iter_user_relationship_matrices),
+        'optimization-results': (optimization_result_model.import_optimization_results,
+                                 optimization_result_model.iter_user_optimization_results),
+    }[kind]
+
+@app.route('/api/import/<kind>', methods=['POST'])
+@jwt_required()
+def bulk_import(kind):
+    try:
+        user_id = get_jwt_identity()
+        if kind not in BULK_KINDS:
+            return jsonify({'success': False, 'message': f"Unknown import kind '{kind}'"}), 404
+        fmt = request_format(request.args.get('format'), request.content_type)
+        if fmt not in BULK_FORMATS:
+            return jsonify({'success': False, 'message': f"Format must be one of {', '.join(BULK_FORMATS)}"}), 400
+
+        # The body is parsed line by line and written in batches, never held in memory whole
+        records = read_records(kind, fmt, iter_text_lines(request.stream))
+        import_records, _ = bulk_handlers(kind)
+        result = import_records(user_id, records)
+        if result['success']:
+            return jsonify(result)
+        status = 400 if result.pop('invalid', False) else 500
+        return jsonify(result), status
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Import error: {str(e)}'}), 500
+
+@app.route('/api/export/<kind>', methods=['GET'])
+@jwt_required()
+def bulk_export(kind):
+    try:
+        user_id = get_jwt_identity()
+        if kind not in BULK_KINDS:
+            return jsonify({'success': False, 'message': f"Unknown export kind '{kind}'"}), 404
+        fmt = (request.args.get('format') or 'ndjson').lower()
+        if fmt not in BULK_FORMATS:
+            return jsonify({'success': False, 'message': f"Format must be one of {', '.join(BULK_FORMATS)}"}), 400
+
+        _, iter_documents = bulk_handlers(kind)
+        if kind == 'optimization-results':
+            _, include_images = history_options(request.args)
+            documents = iter_documents(user_id, include_images=include_images)
+        else:
+            documents = iter_documents(user_id)
+
+        if fmt == 'csv':
+            body, mimetype = render_csv(kind, documents), 'text/csv'
+        else:
+            body, mimetype = render_ndjson(documents, app.json.dumps), 'application/x-ndjson'
+        response = Response(stream_with_context(body), mimetype=mimetype)
+        response.headers['Content-Disposition'] = f'attachment; filename="{kind}.{fmt}"'
+        return response
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Export error: {str(e)}'}), 500
+
+@app.route('/api/profiles/<profile_id>', methods=['GET'])
+@jwt_required()
+def download_profile(profile_id):
+    # Only the user whose run was profiled can download the dump
+    path = profile_dump_path(profile_id, get_jwt_identity())
+    if not path:
+        return jsonify({'success': False, 'message': 'Profile not found'}), 404
+    return send_file(path, mimetype='application/octet-stream', as_attachment=True,
+                     download_name=f"optimize-{profile_id}.pstats")
+
+@app.route('/api/optimization-results/<result_id>/plot.png', methods=['GET'])
+@jwt_required()
+def get_optimization_plot(result_id):
+    try:
+        user_id = get_jwt_identity()
+        result = optimization_result_model.get_optimization_plot(user_id, result_id)
+        if not result['success']:
+            return jsonify(result), 404
+
+        response = Response(base64.b64decode(result['plot_image']), mimetype='image/png')
+        # Stored results never change
+        response.headers['Cache-Control'] = 'private, max-age=86400'
+        return response
+
+    except binascii.Error as e:
+        return jsonify({'success': False, 'message': f'Stored plot is not valid base64: {str(e)}'}), 500
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error fetching plot: {str(e)}'}), 500
+
+@app.route('/api/optimization-results/<result_id>/layouts/<int:rank>/plot.png', methods=['GET'])
+@jwt_required()
+def get_top_layout_plot(result_id, rank):
+    try:
+        user_id = get_jwt_identity()
+        result = optimization_result_model.get_top_layout(user_id, result_id, rank)
+        if not result['success']:
+            return jsonify(result), 404
+
+        layout = result['layout']
+        png = plot_layout_png(layout['positions'], title=f"Layout {rank} (Score: {layout['score']:.0f})")
+        response = Response(png, mimetype='image/png')
+        # Stored results never change
+        response.headers['Cache-Control'] = 'private, max-age=86400'
+        return response
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error rendering layout: {str(e)}'}), 500
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/api/get-optimization-results', methods=['GET'])
 @jwt_required()
 def get_optimization_results():
     try:
         user_id = get_jwt_identity()
-        result = optimization_result_model.get_user_optimization_results(user_id)
+        compact, include_images = history_options(request.args)
+        result = optimization_result_model.get_user_optimization_results(user_id, include_images=include_images)
+        if result['success']:
+            shape_history(result['optimization_results'], compact=compact, include_images=include_images)
         return jsonify(result)
 
     except Exception as e:
@@ -0,0 +1,523 @@
+import os
+import copy
+import sqlite3
+import threading
+from datetime import datetime
+
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import ConnectionFailure, DuplicateKeyError as MongoDuplicateKeyError
+from bson import ObjectId, json_util
+from dotenv import load_dotenv
+
+from telemetry import get_logger
+
+# Load environment variables
+load_dotenv()
+
+logger = get_logger(__name__)
+
+# Where the models keep their data: "mongodb" (MONGODB_URI), "sqlite" (a WAL-mode file
+# at SQLITE_PATH, for single-site deployments) or "memory" (per process, for tests and
+# local benchmarks). Defaults to mongodb when MONGODB_URI is set, else sqlite.
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', '').lower()
+SQLITE_PATH = os.getenv('SQLITE_PATH', 'smartgrid_plannerx.db')
+
+# Every backend implements the same small Mongo-shaped collection API:
+#   find(filter, projection=None, sort=None, limit=0, batch_size=None) -> iterable of documents
+#   find_one(filter, projection=None, sort=None) -> document or None
+#   insert_one(document) -> id;  insert_many(documents) -> [id, ...]
+#   update_one(filter, update, upsert=False);  bulk_upsert([(filter, update), ...])
+#   create_index(keys, unique=False)
+# Filters are field equality (dotted paths allowed) and {"$in": [...]}; updates are
+# {"$set": {...}} and {"$setOnInsert": {...}}; sort is [(field, 1 | -1), ...];
+# projections include ({field: 1}) or exclude ({field: 0}) dotted paths.
+# Inserts that break a unique index raise DuplicateKeyError.
+
+class DuplicateKeyError(Exception):
+    """A write would duplicate a unique key (e.g. a registered email)"""
+
+def _index_keys(keys):
+    # "field" or [("field", direction), ...], as pymongo's create_index takes them
+    return [(keys, 1)] if isinstance(keys, str) else list(keys)
+
+# --- MongoDB ---
+
+class MongoCollection:
+    def __init__(self, collection):
+        self.collection = collection
+
+    def find(self, filter, projection=None, sort=None, limit=0, batch_size=None):
+        cursor = self.collection.find(filter, projection)
+        if sort:
+            cursor = cursor.sort(sort)
+        if limit:
+            cursor = cursor.limit(limit)
+        if batch_size:
+            cursor = cursor.batch_size(batch_size)
+        return cursor
+
+    def find_one(self, filter, projection=None, sort=None):
+        return self.collection.find_one(filter, projection, sort=sort)
+
+    def insert_one(self, document):
+        try:
+            return self.collection.insert_one(document).inserted_id
+        except MongoDuplicateKeyError as e:
+            raise DuplicateKeyError(str(e))
+
+    def insert_many(self, documents):
+        try:
+            return self.collection.insert_many(documents).inserted_ids
+        except MongoDuplicateKeyError as e:
+            raise DuplicateKeyError(str(e))
+
+    def update_one(self, filter, update, upsert=False):
+        self.collection.update_one(filter, update, upsert=upsert)
+
+    def bulk_upsert(self, operations):
+        # One round trip for the whole batch
+        if operations:
+            self.collection.bulk_write([UpdateOne(filter, update, upsert=True) for filter, update in operations],
+                                       ordered=False)
+
+    def create_index(self, keys, unique=False):
+        self.collection.create_index(_index_keys(keys), unique=unique)
+
+class MongoStorage:
+    """MongoDB Atlas (or any MongoDB server) at MONGODB_URI"""
+
+    name = 'mongodb'
+
+    def __init__(self, mongodb_uri=None, database_name=None):
+        mongodb_uri = mongodb_uri or os.getenv('MONGODB_URI')
+        database_name = database_name or os.getenv('DATABASE_NAME', 'smartgrid_plannerx_db')
+        if not mongodb_uri:
+            raise ValueError("MONGODB_URI not found in environment variables")
+
+        try:
+            self.client = MongoClient(mongodb_uri)
+            self.db = self.client[database_name]
+
+            # Test the connection
+            self.client.admin.command('ping')
+            logger.info("Successfully connected to MongoDB Atlas database: %s", database_name)
+        except ConnectionFailure as e:
+            logger.error("Failed to connect to MongoDB: %s", e)
+            raise
+        self._collections = {}
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if name not in self._collections:
+            self._collections[name] = MongoCollection(self.db[name])
+        return self._collections[name]
+
+# --- Shared document helpers for the embedded backends ---
+
+def _plain(value):
+    # Embedded backends keep ids as strings; callers may still pass ObjectIds
+    return str(value) if isinstance(value, ObjectId) else value
+
+def _get_path(document, path):
+    value = document
+    for part in path.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+def _set_path(document, path, value):
+    parts = path.split('.')
+    for part in parts[:-1]:
+        document = document.setdefault(part, {})
+    document[parts[-1]] = value
+
+def _pop_path(document, path):
+    parts = path.split('.')
+    for part in parts[:-1]:
+        document = document.get(part)
+        if not isinstance(document, dict):
+            return
+    document.pop(parts[-1], None)
+
+def _matches(document, filter):
+    for path, condition in filter.items():
+        value = _get_path(document, path)
+        if isinstance(condition, dict) and '$in' in condition:
+            if value not in [_plain(candidate) for candidate in condition['$in']]:
+                return False
+        elif value != _plain(condition):
+            return False
+    return True
+
+def _project(document, projection):
+    if not projection:
+        return document
+    if any(projection.values()):
+        projected = {'_id': document['_id']} if projection.get('_id', 1) else {}
+        for path, include in projection.items():
+            value = _get_path(document, path)
+            if include and path != '_id' and value is not None:
+                _set_path(projected, path, value)
+        return projected
+    for path in projection:
+        _pop_path(document, path)
+    return document
+
+def _sort_key(path):
+    def key(document):
+        value = _get_path(document, path)
+        return (False, 0) if value is None else (True, value)
+    return key
+
+def _sort(documents, sort):
+    # Stable sorts from the last key to the first; missing values sort first, as in MongoDB
+    for path, direction in reversed(sort or []):
+        documents.sort(key=_sort_key(path), reverse=direction < 0)
+    return documents
+
+def _upsert_document(filter, update):
+    document = {path: _plain(value) for path, value in filter.items() if not isinstance(value, dict)}
+    for fields in (update.get('$setOnInsert'), update.get('$set')):
+        for path, value in (fields or {}).items():
+            _set_path(document, path, value)
+    return document
+
+# --- In-memory ---
+
+class MemoryCollection:
+    def __init__(self, lock):
+        self._lock = lock
+        self._documents = {}  # _id -> document, in insertion order
+        self._unique = []  # paths with a unique index
+
+    def find(self, filter, projection=None, sort=None, limit=0, batch_size=None):
+        with self._lock:
+            documents = [copy.deepcopy(document) for document in self._documents.values()
+                         if _matches(document, filter)]
+        documents = _sort(documents, sort)
+        if limit:
+            documents = documents[:limit]
+        return [_project(document, projection) for document in documents]
+
+    def find_one(self, filter, projection=None, sort=None):
+        documents = self.find(filter, projection, sort=sort, limit=1)
+        return documents[0] if documents else None
+
+    def _insert(self, document):
+        document = copy.deepcopy(document)
+        document['_id'] = _plain(document.get('_id')) or str(ObjectId())
+        if document['_id'] in self._documents:
+            raise DuplicateKeyError(f"Duplicate _id {document['_id']}")
+        for path in self._unique:
+            value = _get_path(document, path)
+            if any(_get_path(existing, path) == value for existing in self._documents.values()):
+                raise DuplicateKeyError(f"Duplicate {path} {value}")
+        self._documents[document['_id']] = document
+        return document['_id']
+
+    def insert_one(self, document):
+        with self._lock:
+            return self._insert(document)
+
+    def insert_many(self, documents):
+        with self._lock:
+            return [self._insert(document) for document in documents]
+
+    def update_one(self, filter, update, upsert=False):
+        with self._lock:
+            for document in self._documents.values():
+                if _matches(document, filter):
+                    for path, value in (update.get('$set') or {}).items():
+                        _set_path(document, path, copy.deepcopy(value))
+                    return
+            if upsert:
+                self._insert(_upsert_document(filter, update))
+
+    def bulk_upsert(self, operations):
+        for filter, update in operations:
+            self.update_one(filter, update, upsert=True)
+
+    def create_index(self, keys, unique=False):
+        if unique:
+            self._unique.extend(path for path, _ in _index_keys(keys))
+
+class MemoryStorage:
+    """Process-local storage; everything is lost on exit"""
+
+    name = 'memory'
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._collections = {}
+        logger.info("Using in-memory storage (data is not persisted)")
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = MemoryCollection(self._lock)
+            return self._collections[name]
+
+# --- SQLite ---
+
+# Columns kept next to the JSON document so the history queries use the
+# (user_id, created_at) index instead of json_extract
+SQLITE_COLUMNS = ('_id', 'user_id', 'created_at')
+
+def _created_at_column(value):
+    # Fixed-width text sorts chronologically (milliseconds, as stored in the document)
+    return value.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] if isinstance(value, datetime) else value
+
+def _sqlite_expression(path):
+    if path in SQLITE_COLUMNS:
+        return f'"{path}"'
+    return f"json_extract(document, '$.{path}')"
+
+def _sqlite_value(path, value):
+    value = _plain(value)
+    if path == 'created_at':
+        return _created_at_column(value)
+    # json_extract returns JSON booleans as 1/0
+    return int(value) if isinstance(value, bool) else value
+
+class SQLiteCollection:
+    def __init__(self, storage, table):
+        self.storage = storage
+        self.table = table
+
+    def _where(self, filter):
+        clauses, params = [], []
+        for path, condition in filter.items():
+            expression = _sqlite_expression(path)
+            if isinstance(condition, dict) and '$in' in condition:
+                values = list(condition['$in'])
+                if not values:
+                    clauses.append('0')
+                    continue
+                clauses.append(f"{expression} IN ({', '.join('?' * len(values))})")
+                params.extend(_sqlite_value(path, value) for value in values)
+            elif condition is None:
+                clauses.append(f"{expression} IS NULL")
+            else:
+                clauses.append(f"{expression} = ?")
+                params.append(_sqlite_value(path, condition))
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def _after(self, sort, after):
+        # WHERE clause for the rows that come after the sort key values `after` (keyset
+        # pagination); NULLs sort first, as in SQLite's (and MongoDB's) ordering
+        expressions = [_sqlite_expression(path) for path, _ in sort]
+        if all(direction > 0 for _, direction in sort) and None not in after:
+            # One row-value comparison, which SQLite matches against the index
+            # (ascending only: NULLs, which it cannot compare, all come before `after`)
+            return f"({', '.join(expressions)}) > ({', '.join('?' * len(after))})", list(after)
+        terms, params = [], []
+        for k, ((_, direction), expression, value) in enumerate(zip(sort, expressions, after)):
+            equal = [f"{previous} IS ?" for previous in expressions[:k]]
+            if value is None:
+                beyond = '0' if direction < 0 else f"{expression} IS NOT NULL"
+            elif direction < 0:
+                beyond = f"({expression} < ? OR {expression} IS NULL)"
+            else:
+                beyond = f"{expression} > ?"
+            terms.append('(' + ' AND '.join(equal + [beyond]) + ')')
+            params.extend(after[:k])
+            if value is not None:
+                params.append(value)
+        return '(' + ' OR '.join(terms) + ')', params
+
+    def _select(self, filter, projection, sort, limit, after=None):
+        """
+        Matching documents, sorted and limited. With after (the sort key values of the last
+        row of the previous page) only later rows are read; the sort key values of every
+        row are then returned too, as [(document, keys), ...].
+        """
+        # Excluded paths (e.g. base64 plots) are dropped by SQLite, before they are decoded here
+        document = 'document'
+        excluded = [path for path, include in (projection or {}).items() if not include]
+        if excluded and len(excluded) == len(projection):
+            document = f"json_remove(document, {', '.join('?' * len(excluded))})"
+        where, params = self._where(filter)
+        columns = [document]
+        if after is not None:
+            columns.extend(_sqlite_expression(path) for path, _ in sort)
+            if after:
+                clause, after_params = self._after(sort, after)
+                where = f"{where} AND {clause}" if where else f" WHERE {clause}"
+                params = params + after_params
+        order = ', '.join(f"{_sqlite_expression(path)} {'DESC' if direction < 0 else 'ASC'}"
+                          for path, direction in sort or [])
+        sql = f'SELECT {", ".join(columns)} FROM "{self.table}"{where}'
+        if order:
+            sql += f' ORDER BY {order}'
+        if limit:
+            sql += f' LIMIT {int(limit)}'
+        select_params = [f'$.{path}' for path in excluded] if document != 'document' else []
+        rows = self.storage.execute(sql, select_params + params)
+        if after is not None:
+            return [(_project(json_util.loads(row[0]), projection), row[1:]) for row in rows]
+        return [_project(json_util.loads(row[0]), projection) for row in rows]
+
+    def find(self, filter, projection=None, sort=None, limit=0, batch_size=None):
+        if not batch_size or limit:
+            return self._select(filter, projection, sort, limit)
+        return self._find_batches(filter, projection, sort, batch_size)
+
+    def _find_batches(self, filter, projection, sort, batch_size):
+        # Pages are fetched one query at a time, so no cursor stays open between batches.
+        # Each page starts after the last row of the previous one (on the sort keys, made
+        # unique with _id), so it is an index range read rather than an OFFSET rescan,
+        # and rows written meanwhile are neither skipped nor repeated.
+        sort = list(sort or [])
+        if '_id' not in [path for path, _ in sort]:
+            sort.append(('_id', 1))
+        after = ()
+        while True:
+            batch = self._select(filter, projection, sort, batch_size, after)
+            yield from (document for document, _ in batch)
+            if len(batch) < batch_size:
+                return
+            after = batch[-1][1]
+
+    def find_one(self, filter, projection=None, sort=None):
+        documents = self._select(filter, projection, sort, 1)
+        return documents[0] if documents else None
+
+    def _row(self, document):
+        document = dict(document)
+        document['_id'] = _plain(document.get('_id')) or str(ObjectId())
+        return (document['_id'], document.get('user_id'), _created_at_column(document.get('created_at')),
+                json_util.dumps(document))
+
+    def insert_one(self, document):
+        return self.insert_many([document])[0]
+
+    def insert_many(self, documents):
+        rows = [self._row(document) for document in documents]
+        try:
+            with self.storage.transaction() as connection:
+                connection.executemany(
+                    f'INSERT INTO "{self.table}" (_id, user_id, created_at, document) VALUES (?, ?, ?, ?)', rows
+                )
+        except sqlite3.IntegrityError as e:
+            raise DuplicateKeyError(str(e))
+        return [row[0] for row in rows]
+
+    def _update(self, connection, filter, update, upsert):
+        where, params = self._where(filter)
+        row = connection.execute(f'SELECT _id, document FROM "{self.table}"{where} LIMIT 1', params).fetchone()
+        if row is not None:
+            if update.get('$set'):
+                document = json_util.loads(row[1])
+                for path, value in update['$set'].items():
+                    _set_path(document, path, value)
+                connection.execute(
+                    f'UPDATE "{self.table}" SET user_id = ?, created_at = ?, document = ? WHERE _id = ?',
+                    self._row(document)[1:] + (row[0],)
+                )
+        elif upsert:
+            connection.execute(f'INSERT INTO "{self.table}" (_id, user_id, created_at, document) VALUES (?, ?, ?, ?)',
+                               self._row(_upsert_document(filter, update)))
+
+    def update_one(self, filter, update, upsert=False):
+        try:
+            with self.storage.transaction() as connection:
+                self._update(connection, filter, update, upsert)
+        except sqlite3.IntegrityError as e:
+            raise DuplicateKeyError(str(e))
+
+    def bulk_upsert(self, operations):
+        if not operations:
+            return
+        # Plain _id upserts that only set fields on insert (content-addressed inputs) need no read
+        if all(list(filter) == ['_id'] and list(update) == ['$setOnInsert'] for filter, update in operations):
+            rows = [self._row(_upsert_document(filter, update)) for filter, update in operations]
+            with self.storage.transaction() as connection:
+                connection.executemany(f'INSERT OR IGNORE INTO "{self.table}" (_id, user_id, created_at, document) '
+                                       f'VALUES (?, ?, ?, ?)', rows)
+            return
+        with self.storage.transaction() as connection:
+            for filter, update in operations:
+                self._update(connection, filter, update, True)
+
+    def create_index(self, keys, unique=False):
+        keys = _index_keys(keys)
+        paths = [path for path, _ in keys]
+        if not unique and paths[0] == 'user_id':
+            return  # every table already has the (user_id, created_at, _id) index
+        name = f"{self.table}_{'_'.join(path.replace('.', '_') for path in paths)}"
+        columns = ', '.join(f"{_sqlite_expression(path)} {'DESC' if direction < 0 else 'ASC'}"
+                            for path, direction in keys)
+        self.storage.execute(f'CREATE {"UNIQUE " if unique else ""}INDEX IF NOT EXISTS "{name}" '
+                             f'ON "{self.table}" ({columns})')
+
+class _Transaction:
+    def __init__(self, storage):
+        self.storage = storage
+
+    def __enter__(self):
+        self.storage._lock.acquire()
+        self.storage._connection.execute('BEGIN IMMEDIATE')
+        return self.storage._connection
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.storage._connection.execute('ROLLBACK' if exc_type else 'COMMIT')
+        finally:
+            self.storage._lock.release()
+
+class SQLiteStorage:
+    """
+    Embedded SQLite file in WAL mode: one table per collection holding JSON documents,
+    indexed on (user_id, created_at). Statements of this process share one connection;
+    other processes (e.g. serve.py workers) can read while one writes.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path=None):
+        self.path = path or SQLITE_PATH
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        # Durable at checkpoints rather than every commit; a power cut can lose the last writes only
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute('PRAGMA busy_timeout=5000')
+        self._collections = {}
+        logger.info("Using SQLite storage: %s", self.path)
+
+    def execute(self, sql, params=()):
+        """Run one statement and return all its rows (fetched while holding the connection)"""
+        with self._lock:
+            return self._connection.execute(sql, params).fetchall()
+
+    def transaction(self):
+        return _Transaction(self)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        with self._lock:
+            if name not in self._collections:
+                self.execute(f'CREATE TABLE IF NOT EXISTS "{name}" (_id TEXT PRIMARY KEY, user_id TEXT, '
+                             f'created_at TEXT, document TEXT NOT NULL)')
+                self.execute(f'CREATE INDEX IF NOT EXISTS "{name}_user_created" '
+                             f'ON "{name}" (user_id, created_at, _id)')
+                self._collections[name] = SQLiteCollection(self, name)
+            return self._collections[name]
+
+STORAGE_BACKENDS = {
+    'mongodb': MongoStorage,
+    'sqlite': SQLiteStorage,
+    'memory': MemoryStorage,
+}
+
+def create_storage(backend=None):
+    """The storage named by backend (default STORAGE_BACKEND, see above)"""
+    backend = backend or STORAGE_BACKEND or ('mongodb' if os.getenv('MONGODB_URI') else 'sqlite')
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown STORAGE_BACKEND '{backend}' (expected one of {', '.join(STORAGE_BACKENDS)})")
+    return STORAGE_BACKENDS[backend]()
@@ -0,0 +1,149 @@
+import numpy as np
+
+# REL values and their numeric equivalents for TCR calculation
+# (same scale as REL_VALUES in src/utils/layoutUtils.ts)
+REL_VALUES = {
+    'A': 6,  # Absolutely necessary
+    'E': 5,  # Especially important
+    'I': 4,  # Important
+    'O': 3,  # Ordinary closeness
+    'U': 2,  # Unimportant
+    'X': 1,  # Undesirable
+}
+
+def relationship_matrix(dept_list_names, relationship_definitions, index=None):
+    """
+    Builds a symmetric n x n NumPy array of REL codes ('' where undefined) from
+    [("Dept1", "Dept2", "REL_CODE"), ...]. Malformed items and unknown departments are skipped.
+    index ({dept_name: row}) is reused when given.
+    """
+    if index is None:
+        index = {name: i for i, name in enumerate(dept_list_names)}
+    n = len(dept_list_names)
+    rel_matrix = np.full((n, n), '', dtype='<U1')
+
+    for rel_item in relationship_definitions:
+        if len(rel_item) != 3:
+            continue
+        fr_dept, to_dept, rel_code = rel_item
+        i, j = index.get(fr_dept), index.get(to_dept)
+        if i is None or j is None:
+            continue
+        rel_code = rel_code.strip().upper()[:1]
+        rel_matrix[i, j] = rel_code
+        rel_matrix[j, i] = rel_code
+    return rel_matrix
+
+def compact_relationships(relationship_definitions, dept_list_names=None):
+    """
+    Compact form of [("Dept1", "Dept2", "REL_CODE"), ...]:
+    {'departments': [...], 'matrix': ['-AX', 'A--', 'X--']}, one string of REL codes per
+    department row ('-' where undefined). Rows follow dept_list_names, then any other
+    departments named in the triples.
+    """
+    names = list(dept_list_names or [])
+    seen = set(names)
+    for rel_item in relationship_definitions:
+        if len(rel_item) != 3:
+            continue
+        for name in rel_item[:2]:
+            if name not in seen:
+                seen.add(name)
+                names.append(name)
+    rel_matrix = relationship_matrix(names, relationship_definitions)
+    return {'departments': names, 'matrix': [''.join(code or '-' for code in row) for row in rel_matrix]}
+
+def parse_relationship_rows(rows):
+    """REL code matrix (list of lists, '' where undefined) from compact row strings like '-AX'"""
+    return [['' if code == '-' else code for code in row] for row in rows]
+
+def convert_rel_to_tcr(rel_matrix):
+    """
+    Converts a REL code matrix to its numeric TCR values (0 for empty/unknown codes).
+    """
+    rel_matrix = np.asarray(rel_matrix)
+    tcr_matrix = np.zeros(rel_matrix.shape, dtype=int)
+    for code, value in REL_VALUES.items():
+        tcr_matrix[rel_matrix == code] = value
+    return tcr_matrix
+
+def calculate_tcr_scores(rel_matrix):
+    """
+    Total Closeness Rating of every department: the sum of its row's REL values.
+    """
+    return convert_rel_to_tcr(rel_matrix).sum(axis=1)
+
+def tcr_order(tcr_scores, department_areas):
+    """
+    Department rows ordered by TCR (highest first), ties broken by larger area,
+    then by original row order.
+    """
+    tcr_scores = np.asarray(tcr_scores)
+    department_areas = np.asarray(department_areas, dtype=float)
+    return np.lexsort((-department_areas, -tcr_scores))
+
+def generate_tcr_sequence(rel_matrix, department_areas, tcr_scores=None):
+    """
+    Placement sequence (as rows) following generateOptimalSequence in layoutUtils.ts:
+      1. Start with the highest TCR department (tie-break by area).
+      2. Next is the unplaced department with an 'A' relationship to the last one
+         (several: larger area, then higher TCR wins).
+      3. Without 'A' candidates, take the highest TCR unplaced department.
+    """
+    rel_matrix = np.asarray(rel_matrix)
+    department_areas = np.asarray(department_areas, dtype=float)
+    if tcr_scores is None:
+        tcr_scores = calculate_tcr_scores(rel_matrix)
+    tcr_scores = np.asarray(tcr_scores)
+
+    n = len(rel_matrix)
+    if n == 0:
+        return []
+
+    by_tcr = tcr_order(tcr_scores, department_areas)
+    a_links = rel_matrix == 'A'
+    placed = np.zeros(n, dtype=bool)
+
+    sequence = [int(by_tcr[0])]
+    placed[by_tcr[0]] = True
+    while len(sequence) < n:
+        candidates = np.flatnonzero(a_links[sequence[-1]] & ~placed)
+        if candidates.size:
+            best = candidates[np.lexsort((-tcr_scores[candidates], -department_areas[candidates]))[0]]
+        else:
+            best = by_tcr[~placed[by_tcr]][0]
+        sequence.append(int(best))
+        placed[best] = True
+    return sequence
+
+def tcr_analysis(department_areas_info, relationship_definitions=None, rel_matrix=None, index=None):
+    """
+    TCR scores, TCR ranking and TCR-based placement sequence for a department set.
+
+    Args:
+        department_areas_info (dict): Dept names as keys, areas as values (row order).
+        relationship_definitions (list): [("Dept1", "Dept2", "REL_CODE"), ...], used
+                                         when rel_matrix is not given.
+        rel_matrix (array-like): n x n REL code matrix in department order, or
+                                 n compact row strings (see compact_relationships).
+
+    Returns:
+        dict: tcr_scores ({dept: score}), order and sequence (lists of dept names).
+    """
+    dept_list_names = list(department_areas_info.keys())
+    if rel_matrix is None:
+        rel_matrix = relationship_matrix(dept_list_names, relationship_definitions or [], index)
+    elif len(rel_matrix) and isinstance(rel_matrix[0], str):
+        rel_matrix = parse_relationship_rows(rel_matrix)
+    rel_matrix = np.asarray(rel_matrix)
+    if rel_matrix.shape != (len(dept_list_names), len(dept_list_names)):
+        raise ValueError(f"Relationship matrix must be {len(dept_list_names)}x{len(dept_list_names)}, "
+                         f"got {'x'.join(map(str, rel_matrix.shape))}")
+
+    areas = np.array([department_areas_info[d] for d in dept_list_names], dtype=float)
+    scores = calculate_tcr_scores(rel_matrix)
+    return {
+        'tcr_scores': {d: int(score) for d, score in zip(dept_list_names, scores)},
+        'order': [dept_list_names[i] for i in tcr_order(scores, areas)],
+        'sequence': [dept_list_names[i] for i in generate_tcr_sequence(rel_matrix, areas, scores)],
+    }
@@ -0,0 +1,382 @@
+import os
+import re
+import json
+import time
+import uuid
+import pstats
+import cProfile
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# LOG_LEVEL: DEBUG, INFO, WARNING, ... ; LOG_FORMAT: "text" or "json"
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text').lower()
+# Hot-path messages are only emitted once every LOG_SAMPLE_EVERY occurrences
+LOG_SAMPLE_EVERY = max(1, int(os.getenv('LOG_SAMPLE_EVERY', 100)))
+# Where pstats dumps of profiled runs are kept for download
+PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'smartgrid_profiles'))
+# Dumps older than this are deleted (checked whenever a new one is saved)
+PROFILE_TTL_SECONDS = int(os.getenv('PROFILE_TTL_SECONDS', 86400))
+
+# Third-party loggers that stay at WARNING even when LOG_LEVEL=DEBUG
+QUIET_LOGGERS = ('matplotlib', 'PIL', 'pymongo', 'urllib3', 'werkzeug')
+
+_configured = False
+_configure_lock = threading.Lock()
+
+class StructuredFormatter(logging.Formatter):
+    """Formats records as one line, with any `fields` passed via extra= appended (text) or merged (json)"""
+
+    def __init__(self, fmt_kind='text'):
+        super().__init__()
+        self.fmt_kind = fmt_kind
+
+    def format(self, record):
+        fields = getattr(record, 'fields', None) or {}
+        if self.fmt_kind == 'json':
+            entry = {
+                'ts': round(record.created, 3),
+                'level': record.levelname,
+                'logger': record.name,
+                'msg': record.getMessage(),
+                **fields
+            }
+            if record.exc_info:
+                entry['exc'] = self.formatException(record.exc_info)
+            return json.dumps(entry, default=str)
+
+        line = f"{self.formatTime(record)} {record.levelname:<7} {record.name}: {record.getMessage()}"
+        if fields:
+            line += ' ' + ' '.join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_info:
+            line += '\n' + self.formatException(record.exc_info)
+        return line
+
+def configure_logging():
+    """Install the structured handler on the root logger once per process"""
+    global _configured
+    with _configure_lock:
+        if _configured:
+            return
+        handler = logging.StreamHandler()
+        handler.setFormatter(StructuredFormatter(LOG_FORMAT))
+        root = logging.getLogger()
+        root.addHandler(handler)
+        root.setLevel(LOG_LEVEL)
+        for name in QUIET_LOGGERS:
+            logging.getLogger(name).setLevel(max(logging.WARNING, root.level))
+        _configured = True
+
+def get_logger(name):
+    """Get a logger that writes through the structured handler"""
+    configure_logging()
+    return logging.getLogger(name)
+
+_sample_counts = {}
+_sample_lock = threading.Lock()
+
+def log_sampled(logger, level, key, msg, *args, every=None):
+    """
+    Log msg only on the 1st, (every+1)th, ... occurrence of key, so warnings raised
+    inside tight loops cost a counter increment instead of a write.
+    The number of suppressed occurrences is attached as a field.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    every = every or LOG_SAMPLE_EVERY
+    with _sample_lock:
+        count = _sample_counts.get(key, 0)
+        _sample_counts[key] = count + 1
+    if count % every == 0:
+        logger.log(level, msg, *args, extra={'fields': {'sampled_every': every, 'occurrences': count + 1}})
+
+class PhaseTimer:
+    """
+    Collects wall-clock durations (milliseconds) of named phases.
+
+        timer = PhaseTimer()
+        with timer.phase('ga'):
+            ...
+        timer.timings  # {'ga': 12.3}
+    """
+
+    def __init__(self):
+        self.timings = {}
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000.0
+            self.timings[name] = round(self.timings.get(name, 0.0) + elapsed, 3)
+
+# --- Profiling ---
+
+_PROFILE_ID = re.compile(r'^[0-9a-f]{32}$')
+
+class RunProfiler:
+    """
+    Deterministic (cProfile) profiler for one optimization run on the current thread.
+
+        profiler = RunProfiler().start()
+        ...
+        profiler.stop()
+        profiler.report(top=25)  # top functions by cumulative time + pstats dump id
+    """
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.running = False
+
+    def start(self):
+        self.profile.enable()
+        self.running = True
+        return self
+
+    def stop(self):
+        if self.running:
+            self.profile.disable()
+            self.running = False
+
+    def report(self, top=25, save=True, owner=None):
+        """
+        Returns {'profileId': id or None, 'top': [...]} where each top entry has function,
+        file, line, calls, cumulativeMs and totalMs. With save, the pstats dump is written
+        to PROFILE_DIR under profileId, recorded as owner's (see profile_dump_path).
+        """
+        self.stop()
+        stats = pstats.Stats(self.profile)
+        rows = []
+        for (filename, line, function), (primitive_calls, calls, total, cumulative, _) in stats.stats.items():
+            rows.append({
+                'function': function,
+                'file': os.path.basename(filename),
+                'line': line,
+                'calls': calls,
+                'cumulativeMs': round(cumulative * 1000.0, 3),
+                'totalMs': round(total * 1000.0, 3)
+            })
+        rows.sort(key=lambda row: row['cumulativeMs'], reverse=True)
+
+        profile_id = None
+        if save:
+            profile_id = uuid.uuid4().hex
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            prune_profile_dumps()
+            dump_path, owner_path = _profile_paths(profile_id)
+            stats.dump_stats(dump_path)
+            with open(owner_path, 'w', encoding='utf-8') as f:
+                json.dump({'user_id': owner}, f)
+        return {'profileId': profile_id, 'top': rows[:top]}
+
+def _profile_paths(profile_id):
+    # (pstats dump, owner .json) paths, or None if profile_id is not a valid id
+    if not _PROFILE_ID.match(profile_id or ''):
+        return None
+    base = os.path.join(PROFILE_DIR, profile_id)
+    return f"{base}.pstats", f"{base}.json"
+
+def profile_dump_path(profile_id, user_id):
+    """Path of a saved pstats dump owned by user_id, or None if there is none (or it expired)"""
+    paths = _profile_paths(profile_id)
+    if not paths or not all(os.path.exists(path) for path in paths):
+        return None
+    dump_path, owner_path = paths
+    if os.path.getmtime(dump_path) < time.time() - PROFILE_TTL_SECONDS:
+        return None
+    with open(owner_path, 'r', encoding='utf-8') as f:
+        owner = json.load(f).get('user_id')
+    return dump_path if owner is not None and owner == user_id else None
+
+def prune_profile_dumps():
+    """Delete the dumps (and owner files) in PROFILE_DIR older than PROFILE_TTL_SECONDS"""
+    cutoff = time.time() - PROFILE_TTL_SECONDS
+    try:
+        names = os.listdir(PROFILE_DIR)
+    except FileNotFoundError:
+        return
+    for name in names:
+        profile_id, ext = os.path.splitext(name)
+        if ext not in ('.pstats', '.json') or not _PROFILE_ID.match(profile_id):
+            continue
+        path = os.path.join(PROFILE_DIR, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except FileNotFoundError:
+            pass  # Pruned concurrently
+
+# --- Metrics (Prometheus text exposition format) ---
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + list((extra or {}).items())
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_value(key, value))
+        return lines
+
+    def _render_value(self, key, value):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    @contextmanager
+    def track_inprogress(self, **labels):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['counts'][i] += 1
+                    break
+            state['sum'] += value
+            state['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _render_value(self, key, state):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, state['counts']):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, {'le': _format_value(bound)})
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(state['sum'])}")
+        lines.append(f"{self.name}_count{labels} {state['count']}")
+        return lines
+
+class MetricsRegistry:
+    """Holds this process's metrics and renders them for a /metrics scrape"""
+
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+REGISTRY = MetricsRegistry()
+
+OPTIMIZE_LATENCY = REGISTRY.register(Histogram(
+    'optimize_request_seconds', 'Latency of /optimize requests', ('mode',)))
+OPTIMIZATIONS_IN_FLIGHT = REGISTRY.register(Gauge(
+    'optimizations_in_flight', 'Optimization runs currently executing', ('endpoint',)))
+GA_GENERATIONS_PER_SECOND = REGISTRY.register(Histogram(
+    'ga_generations_per_second', 'Generations per second of each optimization run', ('mode',),
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)))
+GA_FITNESS_EVALUATIONS = REGISTRY.register(Histogram(
+    'ga_fitness_evaluations', 'Fitness evaluations per optimization run', ('mode',),
+    buckets=(100, 500, 1000, 5000, 10000, 50000, 100000, 500000, 1000000)))
+CACHE_LOOKUPS = REGISTRY.register(Counter(
+    'cache_lookups_total', 'Cache lookups (hit rate = cache_hits_total / cache_lookups_total)', ('cache',)))
+CACHE_HITS = REGISTRY.register(Counter(
+    'cache_hits_total', 'Cache lookups that were served from the cache', ('cache',)))
+PLOT_RENDER_SECONDS = REGISTRY.register(Histogram(
+    'plot_render_seconds', 'Time to render and encode a layout plot'))
+DB_OPERATION_SECONDS = REGISTRY.register(Histogram(
+    'db_operation_seconds', 'Latency of database model methods', ('method',)))
+
+def record_run_metrics(mode, report):
+    """Record GA throughput and cache metrics from a run's report (timings + stats)"""
+    stats = report.get('stats') or {}
+    ga_ms = (report.get('timings') or {}).get('ga')
+    if stats.get('generations') and ga_ms:
+        GA_GENERATIONS_PER_SECOND.observe(stats['generations'] / (ga_ms / 1000.0), mode=mode)
+    if 'evaluations' in stats:
+        GA_FITNESS_EVALUATIONS.observe(stats['evaluations'], mode=mode)
+    if stats.get('cache_lookups'):
+        CACHE_LOOKUPS.inc(stats['cache_lookups'], cache='fitness')
+        CACHE_HITS.inc(stats.get('cache_hits', 0), cache='fitness')
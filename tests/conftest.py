@@ -0,0 +1,9 @@
+import os
+import tempfile
+
+# Set before the application modules read them at import time
+os.environ['STORAGE_BACKEND'] = 'memory'
+os.environ['BCRYPT_ROUNDS'] = '4'
+os.environ.setdefault('CHECKPOINT_DIR', tempfile.mkdtemp(prefix='smartgrid-test-checkpoints-'))
+os.environ.setdefault('PROFILE_DIR', tempfile.mkdtemp(prefix='smartgrid-test-profiles-'))
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
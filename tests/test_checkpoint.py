@@ -0,0 +1,152 @@
+import os
+import random
+import time
+
+import pytest
+
+import checkpoint
+import python_script
+from checkpoint import (
+    RunningCheckpoints,
+    delete_checkpoint,
+    load_checkpoint_job,
+    load_checkpoint_state,
+    save_checkpoint_job,
+    save_checkpoint_state,
+)
+from python_script import run_facility_layout_optimization
+
+DEPARTMENTS = {"R": 100, "OA": 150, "OB": 150, "MR": 200, "L": 300, "S": 80, "BR": 120, "X1": 90, "X2": 60}
+RELATIONSHIPS = [
+    ("R", "OA", "A"), ("R", "MR", "E"), ("OA", "OB", "I"), ("L", "S", "A"),
+    ("MR", "L", "X"), ("BR", "OA", "I"), ("X1", "X2", "E"), ("X1", "R", "O"),
+]
+GENERATIONS = 40
+
+@pytest.fixture(autouse=True)
+def checkpoint_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpoint, 'CHECKPOINT_DIR', str(tmp_path))
+    monkeypatch.setattr(python_script, 'CHECKPOINT_EVERY', 5)
+
+@pytest.fixture
+def snapshots(monkeypatch):
+    # Every checkpoint overwrites the last, so keep each one as it is read back
+    saved = {}
+
+    def save_and_keep(job_id, dept_list_names, state):
+        save_checkpoint_state(job_id, dept_list_names, state)
+        saved[state['generation']] = load_checkpoint_state(job_id)
+
+    monkeypatch.setattr(python_script, 'save_checkpoint_state', save_and_keep)
+    return saved
+
+def run(job_id, generations=GENERATIONS, resume_state=None, **options):
+    random.seed(7)
+    report = {}
+    result = run_facility_layout_optimization(
+        DEPARTMENTS, RELATIONSHIPS, None, pop_size=20, generations=generations,
+        checkpoint_id=job_id, resume_state=resume_state, top_k=3, report=report, **options
+    )
+    return result, report
+
+def assert_same_run(expected, actual):
+    (best, positions, score, history), report = expected
+    (resumed_best, resumed_positions, resumed_score, resumed_history), resumed_report = actual
+    assert resumed_best == best
+    assert resumed_positions == positions
+    assert resumed_score == score
+    assert resumed_history == history
+    assert resumed_report['top_layouts'] == report['top_layouts']
+    assert resumed_report.get('parameter_trajectory') == report.get('parameter_trajectory')
+
+@pytest.mark.parametrize('options', [
+    {},
+    {'adaptive': True},
+    {'adaptive': True, 'evaluation_budget': 300},
+    {'adaptive': True, 'evaluation_budget': 150},
+])
+def test_resume_matches_uninterrupted_run(snapshots, options):
+    expected = run('a' * 32, **options)
+    evaluations = expected[1]['stats']['evaluations']
+    if 'evaluation_budget' in options:
+        assert evaluations == options['evaluation_budget']
+
+    interrupted = sorted(generation for generation in snapshots if generation < len(expected[0][3]) - 1)
+    assert interrupted
+    for generation in interrupted:
+        resumed = run('b' * 32, resume_state=snapshots[generation], **options)
+        assert_same_run(expected, resumed)
+        # stats count the generations from the checkpoint on, evaluations the whole run
+        assert resumed[1]['stats']['generations'] == len(expected[0][3]) - generation
+        assert resumed[1]['stats']['evaluations'] == evaluations
+
+def test_extending_a_finished_run_matches_a_longer_run():
+    expected = run('a' * 32)
+    run('b' * 32, generations=15)
+    extended = run('b' * 32, resume_state=load_checkpoint_state('b' * 32))
+    assert_same_run(expected, extended)
+
+def test_state_round_trips_through_npz():
+    names = list(DEPARTMENTS)
+    random.seed(3)
+    state = {
+        'generation': 9,
+        'population': [random.sample(names, len(names)) for _ in range(4)],
+        'fitnesses': [12, 7.5, -3, 0],
+        'history': [1, 2.5, 12],
+        'best_sequence': names[::-1],
+        'best_score': 12,
+        'rng_state': random.getstate(),
+        'parameters': {'mutation_rate': 0.25, 'tournament_size': 3, 'evaluations': 42},
+        'trajectory': [{'generation': 0, 'pop_size': 4}],
+        'hall_of_fame': [{'sequence': names, 'score': 12, 'positions': {}}],
+        'fitness_cache': [(names, 12), (names[::-1], 7.5)],
+        'layout_cache': [(names, 12)],
+    }
+    save_checkpoint_state('c' * 32, names, state)
+    loaded = load_checkpoint_state('c' * 32)
+
+    assert loaded['dept_list_names'] == names
+    for field in ('generation', 'population', 'fitnesses', 'history', 'best_sequence', 'best_score',
+                  'rng_state', 'parameters', 'trajectory', 'fitness_cache', 'layout_cache'):
+        assert loaded[field] == state[field], field
+    assert loaded['hall_of_fame'] == [{'sequence': names, 'score': 12}]
+    assert isinstance(loaded['fitnesses'][0], int)
+
+def test_jobs_are_private_to_their_owner():
+    save_checkpoint_job('d' * 32, 'alice', {'generations': 10})
+    assert load_checkpoint_job('d' * 32, 'alice')['request'] == {'generations': 10}
+    assert load_checkpoint_job('d' * 32, 'bob') is None
+    assert load_checkpoint_job('e' * 32, 'alice') is None
+    assert load_checkpoint_job('../etc/passwd', 'alice') is None
+    assert load_checkpoint_state('e' * 32) is None
+
+def test_expired_checkpoints_are_pruned(tmp_path, monkeypatch):
+    names = list(DEPARTMENTS)
+    state = {'generation': 0, 'population': [names], 'fitnesses': [1], 'history': [1],
+             'best_sequence': names, 'best_score': 1, 'rng_state': random.getstate()}
+    for job_id in ('a' * 32, 'b' * 32):
+        save_checkpoint_job(job_id, 'alice', {})
+        save_checkpoint_state(job_id, names, state)
+    stale = tmp_path / 'abandoned.tmp'
+    stale.write_bytes(b'')
+    old = time.time() - checkpoint.CHECKPOINT_TTL_SECONDS - 60
+    for path in [*checkpoint.checkpoint_paths('a' * 32), str(stale)]:
+        os.utime(path, (old, old))
+
+    assert load_checkpoint_job('a' * 32, 'alice') is None
+    save_checkpoint_job('c' * 32, 'alice', {})
+    assert sorted(os.listdir(tmp_path)) == ['b' * 32 + '.json', 'b' * 32 + '.npz', 'c' * 32 + '.json']
+
+    delete_checkpoint('b' * 32)
+    delete_checkpoint('b' * 32)
+    assert load_checkpoint_state('b' * 32) is None
+    assert load_checkpoint_job('b' * 32, 'alice') is None
+
+def test_a_job_has_one_running_claim():
+    running = RunningCheckpoints()
+    assert running.claim('a' * 32)
+    assert not running.claim('a' * 32)
+    assert running.claim('b' * 32)
+    running.release('a' * 32)
+    assert running.claim('a' * 32)
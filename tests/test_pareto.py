@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from pareto import fast_non_dominated_sort, crowding_distance
+
+def dominates(a, b):
+    return all(x <= y for x, y in zip(a, b)) and any(x < y for x, y in zip(a, b))
+
+def brute_force_fronts(objectives):
+    # Peel off the non-dominated rows one front at a time
+    remaining = set(range(len(objectives)))
+    fronts = []
+    while remaining:
+        front = {i for i in remaining
+                 if not any(dominates(objectives[j], objectives[i]) for j in remaining if j != i)}
+        fronts.append(front)
+        remaining -= front
+    return fronts
+
+def reference_crowding(objectives):
+    n, m = objectives.shape
+    distance = [0.0] * n
+    for k in range(m):
+        order = sorted(range(n), key=lambda i: objectives[i, k])
+        span = objectives[order[-1], k] - objectives[order[0], k]
+        distance[order[0]] = distance[order[-1]] = float('inf')
+        for before, i, after in zip(order, order[1:], order[2:]):
+            if span > 0 and distance[i] != float('inf'):
+                distance[i] += (objectives[after, k] - objectives[before, k]) / span
+    return distance
+
+@pytest.mark.parametrize('seed', range(20))
+def test_fast_non_dominated_sort_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    # Small integer ranges produce ties and duplicate rows
+    objectives = rng.integers(0, 5, size=(rng.integers(1, 40), rng.integers(1, 4)))
+    fronts = [set(front.tolist()) for front in fast_non_dominated_sort(objectives)]
+    assert fronts == brute_force_fronts(objectives.tolist())
+
+@pytest.mark.parametrize('seed', range(20))
+def test_crowding_distance_matches_reference(seed):
+    rng = np.random.default_rng(seed)
+    # Distinct values, so the per-objective order (and hence the distance) is unambiguous
+    objectives = rng.random((rng.integers(3, 30), 3))
+    np.testing.assert_allclose(crowding_distance(objectives), reference_crowding(objectives))
+
+def test_crowding_distance_of_small_fronts_is_infinite():
+    for n in (1, 2):
+        assert np.all(np.isinf(crowding_distance(np.ones((n, 3)))))
+
+def test_identical_rows_share_a_front():
+    objectives = np.array([[1, 2], [1, 2], [0, 3], [2, 2]])
+    fronts = [sorted(front.tolist()) for front in fast_non_dominated_sort(objectives)]
+    assert fronts == [[0, 1, 2], [3]]
@@ -0,0 +1,119 @@
+import os
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+import checkpoint
+from checkpoint import running_checkpoints, save_checkpoint_job
+from server import app
+
+DEPARTMENTS = {"Reception": 100, "Office": 150, "Lab": 300, "Storage": 80, "Break Room": 120}
+RELATIONSHIPS = [
+    {"dept1": "Reception", "dept2": "Office", "relationship": "A"},
+    {"dept1": "Lab", "dept2": "Storage", "relationship": "E"},
+    {"dept1": "Office", "dept2": "Lab", "relationship": "X"},
+]
+
+@pytest.fixture(autouse=True)
+def checkpoint_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpoint, 'CHECKPOINT_DIR', str(tmp_path))
+    return tmp_path
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+@pytest.fixture
+def headers():
+    with app.app_context():
+        return {'Authorization': f"Bearer {create_access_token(identity='user-1')}"}
+
+def optimize(client, headers, **fields):
+    payload = {'departments': DEPARTMENTS, 'relationships': RELATIONSHIPS, 'sequence': list(DEPARTMENTS),
+               'popSize': 10, 'generations': 5, 'inlineImage': False, **fields}
+    return client.post('/optimize', json=payload, headers=headers)
+
+def test_completed_runs_drop_their_checkpoint(client, headers, checkpoint_dir):
+    response = optimize(client, headers, checkpoint=True)
+    assert response.status_code == 200
+    assert response.get_json()['jobId']
+    assert os.listdir(checkpoint_dir) == []
+
+def test_a_running_job_cannot_be_resumed(client, headers):
+    job_id = 'a' * 32
+    save_checkpoint_job(job_id, 'user-1', {'departments': DEPARTMENTS})
+    assert running_checkpoints.claim(job_id)
+    try:
+        assert optimize(client, headers, resumeJobId=job_id).status_code == 409
+    finally:
+        running_checkpoints.release(job_id)
+    # Released again: the checkpoint has no GA state yet, so there is nothing to resume
+    assert optimize(client, headers, resumeJobId=job_id).status_code == 404
+    assert running_checkpoints.claim(job_id)
+    running_checkpoints.release(job_id)
+
+@pytest.mark.parametrize('mode', ['single', 'pareto'])
+def test_small_layouts_accept_the_default_population(client, headers, mode):
+    # 3 departments have 3! = 6 orderings, fewer than the frontend's default popSize of 50
+    departments = dict(list(DEPARTMENTS.items())[:3])
+    response = optimize(client, headers, departments=departments, sequence=list(departments),
+                        popSize=50, mode=mode)
+    assert response.status_code == 200
+    assert sorted(response.get_json()['bestSequence']) == sorted(departments)
+
+def test_a_single_department_is_rejected(client, headers):
+    response = optimize(client, headers, departments={"Lab": 300}, sequence=["Lab"])
+    assert response.status_code == 400
+
+@pytest.mark.parametrize('constraints', [
+    ['Lab'],
+    {'fixedCells': ['Lab']},
+    {'fixedCells': {'Lab': 3}},
+    {'fixedCells': {'Lab': [[0]]}},
+    {'fixedCells': {'Lab': [['a', 'b']]}},
+    {'notAdjacent': 'Lab'},
+    {'notAdjacent': [['Lab']]},
+    {'notAdjacent': [['Lab', 'Office', 'Storage']]},
+    {'notAdjacent': [[{'dept': 'Lab'}, 'Office']]},
+    {'perimeter': 'Lab'},
+    {'perimeter': [['Lab']]},
+])
+@pytest.mark.parametrize('mode', ['single', 'pareto'])
+def test_malformed_constraints_are_rejected(client, headers, constraints, mode):
+    response = optimize(client, headers, constraints=constraints, mode=mode)
+    assert response.status_code == 400
+    assert 'constraints' in response.get_json()['message']
+
+def test_malformed_batch_constraints_are_rejected(client, headers):
+    response = client.post('/api/optimize/batch', headers=headers, json={
+        'departments': DEPARTMENTS, 'relationships': RELATIONSHIPS, 'popSize': 10, 'generations': 5,
+        'scenarios': [{}, {'constraints': {'fixedCells': {'Lab': 3}}}],
+    })
+    assert response.status_code == 400
+    assert response.get_json()['message'].startswith('Scenario 1: constraints.fixedCells')
+
+def test_well_formed_constraints_are_honoured(client, headers):
+    response = optimize(client, headers, constraints={
+        'fixedCells': {'Reception': [[0, 0]]}, 'notAdjacent': [['Lab', 'Office']], 'perimeter': ['Storage'],
+    })
+    assert response.status_code == 200
+    assert response.get_json()['success']
+
+@pytest.mark.parametrize('warm_start_k, message', [
+    (0, 'at least 1'),
+    (-3, 'at least 1'),
+    ('five', 'an integer'),
+    ([5], 'an integer'),
+    (11, 'at most popSize (10)'),
+    (10 ** 9, 'at most popSize (10)'),
+])
+def test_bad_warm_start_k_is_rejected(client, headers, warm_start_k, message):
+    response = optimize(client, headers, warmStart=True, warmStartK=warm_start_k)
+    assert response.status_code == 400
+    assert message in response.get_json()['message']
+
+def test_warm_start_seeds_from_earlier_runs(client, headers):
+    assert optimize(client, headers).status_code == 200
+    response = optimize(client, headers, warmStart=True, warmStartK=10)
+    assert response.status_code == 200
+    assert 1 <= response.get_json()['warmStartSeeds'] <= 10
@@ -0,0 +1,137 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from bulk import EXPORT_BATCH_SIZE
+from database import (
+    UserModel,
+    DepartmentAreaModel,
+    RelationshipMatrixModel,
+    OptimizationResultModel,
+    create_indexes,
+    iter_user_documents,
+)
+from storage import MemoryStorage, SQLiteStorage
+
+DEPARTMENTS = {"Reception": 100, "Office": 150, "Lab": 300}
+RELATIONSHIPS = [{"dept1": "Reception", "dept2": "Office", "relationship": "A"}]
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def storage(request, tmp_path):
+    storage = MemoryStorage() if request.param == 'memory' else SQLiteStorage(str(tmp_path / 'plannerx.db'))
+    create_indexes(storage)
+    return storage
+
+def result_data(score, plot='iVBORw0KGgo='):
+    return {"success": True, "bestScore": score, "bestSequence": list(DEPARTMENTS), "plotImage": plot}
+
+def test_users(storage):
+    users = UserModel(storage)
+    created = users.create_user('ada@example.com', 'secret', 'Ada')
+    assert created['success']
+    assert not users.create_user('ada@example.com', 'other', 'Ada 2')['success']
+
+    assert not users.authenticate_user('ada@example.com', 'wrong')['success']
+    assert not users.authenticate_user('nobody@example.com', 'secret')['success']
+    authenticated = users.authenticate_user('ada@example.com', 'secret')
+    assert authenticated['success']
+    assert authenticated['user']['_id'] == created['user_id']
+    assert 'password' not in authenticated['user']
+
+    user = users.get_user_by_id(created['user_id'])
+    assert user['success']
+    assert user['user']['email'] == 'ada@example.com'
+    assert 'password' not in user['user']
+    assert not users.get_user_by_id('0' * 24)['success']
+
+@pytest.mark.parametrize('model_class, save, get, field, data, changed', [
+    (DepartmentAreaModel, 'save_department_areas', 'get_user_department_areas', 'department_areas',
+     DEPARTMENTS, {**DEPARTMENTS, "Lab": 320}),
+    (RelationshipMatrixModel, 'save_relationship_matrix', 'get_user_relationship_matrices', 'relationship_matrices',
+     RELATIONSHIPS, RELATIONSHIPS + [{"dept1": "Lab", "dept2": "Office", "relationship": "X"}]),
+])
+def test_input_versions(storage, model_class, save, get, field, data, changed):
+    model = model_class(storage)
+    first = getattr(model, save)('u1', data)
+    assert (first['success'], first['version']) == (True, 1)
+    unchanged = getattr(model, save)('u1', data)
+    assert (unchanged['id'], unchanged['version']) == (first['id'], 1)
+    assert getattr(model, save)('u1', changed)['version'] == 2
+    assert getattr(model, save)('u2', changed)['version'] == 1
+
+    versions = getattr(model, get)('u1')[field]
+    assert [version['version'] for version in versions] == [2, 1]
+    data_field = 'department_data' if model_class is DepartmentAreaModel else 'relationship_data'
+    assert [version[data_field] for version in versions] == [changed, data]
+    assert versions[0]['changes']
+
+def test_optimization_results(storage):
+    results = OptimizationResultModel(storage)
+    saved = results.save_optimization_result('u1', DEPARTMENTS, RELATIONSHIPS, result_data(10))
+    assert saved['success']
+    batch = results.save_optimization_results('u1', [
+        {"department_data": DEPARTMENTS, "relationship_data": RELATIONSHIPS, "result_data": result_data(score)}
+        for score in (11, 12)
+    ])
+    assert len(batch['ids']) == 2
+    results.save_optimization_result('u2', DEPARTMENTS, RELATIONSHIPS, result_data(99))
+
+    with_images = results.get_user_optimization_results('u1')['optimization_results']
+    assert sorted(result['result_data']['bestScore'] for result in with_images) == [10, 11, 12]
+    for result in with_images:
+        assert result['department_data'] == DEPARTMENTS
+        assert result['relationship_data'] == RELATIONSHIPS
+        assert result['result_data']['plotImage']
+
+    without_images = results.get_user_optimization_results('u1', include_images=False)['optimization_results']
+    assert [result['_id'] for result in without_images] == [result['_id'] for result in with_images]
+    assert all('plotImage' not in result['result_data'] for result in without_images)
+
+    assert results.get_optimization_plot('u1', saved['id'])['plot_image'] == 'iVBORw0KGgo='
+    assert not results.get_optimization_plot('u2', saved['id'])['success']
+    assert results.get_warm_start_sequences('u1', list(DEPARTMENTS))['sequences'] == [list(DEPARTMENTS)]
+
+def test_export_is_oldest_first(storage):
+    results = OptimizationResultModel(storage)
+    # The batch shares one created_at, so _id has to break the tie
+    results.save_optimization_result('u1', DEPARTMENTS, RELATIONSHIPS, result_data(0))
+    ids = results.save_optimization_results('u1', [
+        {"department_data": DEPARTMENTS, "relationship_data": RELATIONSHIPS, "result_data": result_data(score)}
+        for score in range(1, 8)
+    ])['ids']
+
+    exported = list(results.iter_user_optimization_results('u1', include_images=False))
+    assert [result['result_data']['bestScore'] for result in exported] == list(range(8))
+    assert [result['_id'] for result in exported][1:] == ids
+    assert all('plotImage' not in result['result_data'] for result in exported)
+
+    paged = list(iter_user_documents(results.collection, results.inputs, 'u1', batch_size=3))
+    assert [result['_id'] for result in paged] == [result['_id'] for result in exported]
+    assert paged[0]['department_data'] == DEPARTMENTS
+
+@pytest.mark.parametrize('sort', [
+    [("created_at", 1), ("_id", 1)],
+    [("created_at", -1), ("_id", -1)],
+    [("created_at", 1)],
+    [("score", 1)],
+    [("score", -1), ("created_at", 1)],
+    [("created_at", -1), ("score", 1)],
+])
+def test_paged_find_matches_unpaged(storage, sort):
+    collection = storage.optimization_results
+    start = datetime(2026, 1, 1)
+    # Ties on created_at and missing scores exercise every branch of the page boundary
+    collection.insert_many([
+        {"user_id": "u1", "created_at": start + timedelta(seconds=i // 3),
+         **({"score": i % 4} if i % 5 else {})}
+        for i in range(25)
+    ])
+    collection.insert_one({"user_id": "u2", "created_at": start, "score": 1})
+
+    # Pages break ties on _id, so compare with a sort that does the same
+    full_sort = sort if sort[-1][0] == '_id' else sort + [("_id", 1)]
+    expected = [document['_id'] for document in collection.find({"user_id": "u1"}, sort=full_sort)]
+    assert len(expected) == 25
+    for batch_size in (1, 4, EXPORT_BATCH_SIZE):
+        paged = collection.find({"user_id": "u1"}, sort=sort, batch_size=batch_size)
+        assert [document['_id'] for document in paged] == expected
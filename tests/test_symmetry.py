@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+from python_script import (
+    prepare_layout_problem,
+    build_layout_symmetry,
+    canonical_layout_key,
+    sequence_key,
+    place_layout,
+    calculate_fitness,
+    calculate_fitness_sparse,
+)
+
+DEPARTMENTS = {
+    "Reception": 100, "Office A": 150, "Office B": 150, "Meeting Room": 200,
+    "Lab": 300, "Storage": 80, "Break Room": 120, "Archive": 60, "Copy Room": 60,
+}
+# Archive and Copy Room have no relationship, so they are interchangeable
+RELATIONSHIPS = [
+    ("Reception", "Office A", "A"), ("Reception", "Meeting Room", "E"),
+    ("Office A", "Office B", "I"), ("Lab", "Storage", "A"),
+    ("Meeting Room", "Lab", "X"), ("Break Room", "Office B", "O"),
+]
+
+@pytest.mark.parametrize('constraints', [
+    None,
+    {'perimeter': ['Lab'], 'not_adjacent': [('Reception', 'Storage')]},
+    {'fixed_cells': {'Reception': [(0, 0)]}},
+])
+def test_equal_canonical_keys_have_equal_fitness(constraints):
+    problem = prepare_layout_problem(DEPARTMENTS, RELATIONSHIPS, None, constraints)
+    names = problem['dept_list_names']
+    symmetry = build_layout_symmetry(names, problem['grid_values_map'],
+                                     problem['relation_dict_weights'], problem['constraints'])
+    rng = random.Random(0)
+
+    fitness_by_key = {}
+    grids_by_key = {}
+    for _ in range(5000):
+        sequence = rng.sample(names, len(names))
+        grid, positions = place_layout(sequence, problem['grid_values_map'], problem['constraints'])
+        key = canonical_layout_key(grid, symmetry)
+        if key is None:
+            assert positions is None
+            continue
+        fitness = calculate_fitness(positions, problem['relation_dict_weights'])
+        assert calculate_fitness_sparse(positions, problem['relation_csr']) == fitness
+        assert fitness_by_key.setdefault(key, fitness) == fitness
+        grids_by_key.setdefault(key, set()).add(tuple(map(tuple, grid)))
+
+    # The check is only meaningful if distinct grids actually shared keys
+    assert any(len(grids) > 1 for grids in grids_by_key.values())
+
+def test_sequence_key_folds_interchangeable_departments():
+    problem = prepare_layout_problem(DEPARTMENTS, RELATIONSHIPS, None)
+    symmetry = build_layout_symmetry(problem['dept_list_names'], problem['grid_values_map'],
+                                     problem['relation_dict_weights'])
+    sequence = list(DEPARTMENTS)
+    swapped = sequence[:-2] + [sequence[-1], sequence[-2]]
+    assert sequence_key(sequence, symmetry) == sequence_key(swapped, symmetry)
+    assert sequence_key(sequence, symmetry) != sequence_key(sequence[::-1], symmetry)
+
+def test_fixed_cells_disable_mirroring():
+    problem = prepare_layout_problem(DEPARTMENTS, RELATIONSHIPS, None,
+                                     {'fixed_cells': {'Reception': [(0, 0)]}})
+    symmetry = build_layout_symmetry(problem['dept_list_names'], problem['grid_values_map'],
+                                     problem['relation_dict_weights'], problem['constraints'])
+    assert not symmetry['mirror']
@@ -0,0 +1,70 @@
+import json
+import hashlib
+
+# Input documents are content-addressed: identical department or relationship
+# inputs hash to the same id and are stored once. Saves keep a per-user version
+# chain that records what changed since the previous version.
+
+# Stored documents reference their inputs by hash: (data field, reference field)
+INPUT_REFERENCES = (
+    ('department_data', 'department_ref'),
+    ('relationship_data', 'relationship_ref'),
+)
+
+def content_hash(kind, data):
+    """
+    sha256 of an input's canonical JSON. Department order is significant (it is the
+    row order of the layout problem), so dict order is kept rather than sorted.
+    """
+    payload = json.dumps([kind, data], separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def diff_departments(previous, current):
+    """Changes from one {dept: area} dict to another: added, removed and changed areas"""
+    previous = previous or {}
+    current = current or {}
+    return {
+        'added': {name: area for name, area in current.items() if name not in previous},
+        'removed': [name for name in previous if name not in current],
+        'changed': {name: area for name, area in current.items()
+                    if name in previous and previous[name] != area},
+    }
+
+def _relationship_codes(relationship_data):
+    codes = {}
+    for rel_item in relationship_data or []:
+        if len(rel_item) != 3:
+            continue
+        fr_dept, to_dept, rel_code = rel_item
+        codes[tuple(sorted((fr_dept, to_dept)))] = rel_code
+    return codes
+
+def diff_relationships(previous, current):
+    """
+    Changes from one [("Dept1", "Dept2", "REL_CODE"), ...] list to another, as triples.
+    Pairs are unordered, so ("A", "B", ...) and ("B", "A", ...) are the same relationship.
+    """
+    previous = _relationship_codes(previous)
+    current = _relationship_codes(current)
+    return {
+        'added': [[*pair, code] for pair, code in current.items() if pair not in previous],
+        'removed': [[*pair, code] for pair, code in previous.items() if pair not in current],
+        'changed': [[*pair, code] for pair, code in current.items()
+                    if pair in previous and previous[pair] != code],
+    }
+
+def input_refs(documents):
+    """Every input hash referenced by the documents"""
+    return {document[ref_field] for document in documents
+            for _, ref_field in INPUT_REFERENCES if document.get(ref_field)}
+
+def attach_inputs(documents, inputs_by_ref):
+    """
+    Fill in department_data / relationship_data of documents that store them by reference,
+    so callers see the same shape as documents holding full copies.
+    """
+    for document in documents:
+        for data_field, ref_field in INPUT_REFERENCES:
+            if document.get(ref_field) and data_field not in document:
+                document[data_field] = inputs_by_ref.get(document[ref_field])
+    return documents